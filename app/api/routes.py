@@ -1,23 +1,35 @@
+"""
+API endpoints for Tao dividends, sentiment analysis and staking.
+
+Every endpoint here is I/O-bound (Redis, MongoDB, the blockchain RPC and the
+Celery broker), as are the sentiment and staking tasks they dispatch. Celery
+workers should therefore run with a concurrency well above the CPU count.
+"""
+
 from fastapi import APIRouter, Query, HTTPException, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 import warnings
 from typing import Optional, Dict, Any, Tuple, Callable, List
 import asyncio
+import time
+import orjson
 import logging
-import traceback
+import random
 import redis
 import contextlib
-from celery import chain
+from enum import StrEnum
 from celery.exceptions import CeleryError, TaskRevokedError, TimeoutError as CeleryTimeoutError  # type: ignore
 from celery.result import AsyncResult  # type: ignore
 
-from app.services.cache_service import RedisCacheService
+from app.services.cache_service import (
+    RedisCacheService,
+    PENDING_SENTINEL,
+    ERROR_SENTINEL,
+)
 from app.services.blockchain_service import BlockchainService
 from app.core.config import settings
 from app.auth.auth import get_api_key_from_header
-from app.tasks.sentiment_tasks import analyze_twitter_sentiment_task
-from app.tasks.blockchain_tasks import process_stake_based_on_sentiment_task
-import time
+from app.worker import celery_app
 
 # Import database functions and models
 from app.db import (
@@ -32,11 +44,48 @@ from app.db import (
 
 router = APIRouter(tags=["Tao Dividends"])
 
+# Shared API key dependency used by every endpoint
+API_KEY_DEP = Depends(get_api_key_from_header)
+
 # Initialize services
 cache_service = RedisCacheService()
 blockchain_service = BlockchainService()
 logger = logging.getLogger(__name__)
 
+# Default query parameters, resolved once at import
+_DEFAULT_NETUID = settings.DEFAULT_NETUID
+_DEFAULT_HOTKEY = settings.DEFAULT_HOTKEY
+
+# In-flight blockchain queries keyed by cache key, used to coalesce
+# concurrent cache misses for the same key into a single query
+_inflight_queries: Dict[str, asyncio.Task] = {}
+
+# Database writes running in the background, referenced so they aren't garbage
+# collected before they finish
+_background_writes: set = set()
+
+# (expires_at, payload) of the cached response for the default netuid/hotkey pair,
+# by far the most requested, so most requests are answered without Redis
+_default_dividends_payload: Optional[Tuple[float, bytes]] = None
+
+
+def _get_default_dividends_payload() -> Optional[bytes]:
+    """Get the in-process cached payload for the default pair, if still fresh."""
+    entry = _default_dividends_payload
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _set_default_dividends_payload(payload: Optional[bytes]) -> None:
+    """Remember (or, with None, forget) the cached payload for the default pair."""
+    global _default_dividends_payload
+    _default_dividends_payload = (
+        (time.monotonic() + settings.DEFAULT_DIVIDENDS_TTL_SECONDS, payload)
+        if payload is not None
+        else None
+    )
+
 
 # Custom exceptions for task operations
 class TaskCreationError(Exception):
@@ -45,23 +94,64 @@ class TaskCreationError(Exception):
     pass
 
 
-class TaskChainingError(Exception):
-    """Exception raised when task chaining fails"""
-
-    pass
+# Define error categories
+class ErrorCategory(StrEnum):
+    """Error categories reported in task and blockchain error responses"""
+
+    TASK_CREATION = "Error creating sentiment analysis task"
+    REDIS_ERROR = "Error communicating with Redis"
+    TASK_REVOKED = "Task was revoked or cancelled"
+    TIMEOUT_ERROR = "Task execution timed out"
+    UNKNOWN_ERROR = "Unknown error during task processing"
+    BLOCKCHAIN_ERROR = "Error querying blockchain data"
+
+
+# HTTP status codes for task error categories; anything else is a 500
+_CATEGORY_STATUS_CODES: Dict[ErrorCategory, int] = {
+    ErrorCategory.REDIS_ERROR: status.HTTP_503_SERVICE_UNAVAILABLE,
+    ErrorCategory.TIMEOUT_ERROR: status.HTTP_504_GATEWAY_TIMEOUT,
+    ErrorCategory.TASK_REVOKED: status.HTTP_409_CONFLICT,
+}
 
+# Formatters return (error_details, include_stack_trace) for an exception
+_ErrorFormatter = Callable[[Exception], Tuple[str, bool]]
 
-# Define error categories
-ERROR_CATEGORIES = {
-    "TASK_CREATION": "Error creating sentiment analysis task",
-    "TASK_CHAINING": "Error chaining tasks together",
-    "REDIS_ERROR": "Error communicating with Redis",
-    "TASK_REVOKED": "Task was revoked or cancelled",
-    "TIMEOUT_ERROR": "Task execution timed out",
-    "UNKNOWN_ERROR": "Unknown error during task processing",
-    "BLOCKCHAIN_ERROR": "Error querying blockchain data",
+# Error category and detail formatter per exception type
+_EXCEPTION_HANDLERS: Dict[type, Tuple[ErrorCategory, _ErrorFormatter]] = {
+    TaskRevokedError: (
+        ErrorCategory.TASK_REVOKED,
+        lambda e: (f"Task was revoked: {str(e)}", False),
+    ),
+    redis.RedisError: (
+        ErrorCategory.REDIS_ERROR,
+        lambda e: (f"Redis communication error: {str(e)}", True),
+    ),
+    CeleryTimeoutError: (
+        ErrorCategory.TIMEOUT_ERROR,
+        lambda e: (f"Task execution timed out: {str(e)}", True),
+    ),
+    TaskCreationError: (ErrorCategory.TASK_CREATION, lambda e: (str(e), True)),
+    CeleryError: (
+        ErrorCategory.TASK_CREATION,
+        lambda e: (f"Celery error while creating task: {str(e)}", True),
+    ),
+    ValueError: (ErrorCategory.TASK_CREATION, lambda e: (str(e), True)),
 }
 
+# Handling for any exception type not listed above
+_DEFAULT_EXCEPTION_HANDLER: Tuple[ErrorCategory, _ErrorFormatter] = (
+    ErrorCategory.UNKNOWN_ERROR,
+    lambda e: (f"Unexpected error: {str(e)}", True),
+)
+
+
+def _lookup_by_exception_type(table: Dict[type, Any], e: Exception) -> Any:
+    """Return the entry for the most specific class of the exception, if any."""
+    for cls in type(e).__mro__:
+        if cls in table:
+            return table[cls]
+    return None
+
 
 def log_error(
     error_category: str, error_details: str, include_stack_trace: bool = True
@@ -74,222 +164,201 @@ def log_error(
         error_details: Detailed error message
         include_stack_trace: Whether to include stack trace in the logs
     """
-    logger.error(f"{error_category}: {error_details}")
-    if include_stack_trace:
-        logger.error(f"Stack trace: {traceback.format_exc()}")
+    logger.error(
+        "%s: %s", error_category, error_details, exc_info=include_stack_trace
+    )
 
 
-def handle_task_error(
-    e: Exception,
-    sentiment_task: Optional[AsyncResult] = None,
-    task_chain: Optional[AsyncResult] = None,
-) -> Tuple[str, str]:
+async def handle_task_error(
+    e: Exception, task_manager: "TaskManager"
+) -> Tuple[ErrorCategory, str]:
     """
     Helper function to handle task errors in a consistent way.
-    Also ensures any created tasks are properly revoked.
+    Also ensures the created task is properly revoked.
 
     Args:
         e: The exception that was raised
-        sentiment_task: The sentiment analysis task (if created)
-        task_chain: The task chain (if created)
+        task_manager: Task manager tracking the task created for the request
 
     Returns:
         Tuple of (error_category, error_details)
     """
-    # First, revoke any tasks that were created to prevent orphaned tasks
-    if sentiment_task:
-        try:
-            logger.info(f"Explicitly revoking sentiment task: {sentiment_task.id}")
-            sentiment_task.revoke(terminate=True)
-        except Exception as revoke_error:
-            logger.error(f"Error revoking sentiment task: {str(revoke_error)}")
-
-    if task_chain:
-        try:
-            logger.info(f"Explicitly revoking task chain: {task_chain.id}")
-            task_chain.revoke(terminate=True)
-        except Exception as revoke_error:
-            logger.error(f"Error revoking task chain: {str(revoke_error)}")
-
-    # Determine error category using exception type mapping
-    exception_type_to_category = {
-        redis.RedisError: ERROR_CATEGORIES["REDIS_ERROR"],
-        TaskRevokedError: ERROR_CATEGORIES["TASK_REVOKED"],
-        CeleryTimeoutError: ERROR_CATEGORIES["TIMEOUT_ERROR"],
-        TaskCreationError: ERROR_CATEGORIES["TASK_CREATION"],
-        TaskChainingError: ERROR_CATEGORIES["TASK_CHAINING"],
-    }
-
-    error_category = exception_type_to_category.get(type(e))
-
-    # For exception types not explicitly mapped
-    if error_category is None:
-        if isinstance(e, (CeleryError, ValueError)):
-            # Determine what stage of task creation/chaining failed
-            error_category = (
-                ERROR_CATEGORIES["TASK_CHAINING"]
-                if sentiment_task and not task_chain
-                else ERROR_CATEGORIES["TASK_CREATION"]
-            )
-        else:
-            # Default for any other exception type
-            error_category = ERROR_CATEGORIES["UNKNOWN_ERROR"]
+    # First, revoke the task if it was created to prevent an orphaned task.
+    # This never raises; failures are logged and counted in the metrics.
+    await task_manager.revoke_tasks()
+
+    # Determine error category and formatter using exception type mapping
+    error_category, formatter = (
+        _lookup_by_exception_type(_EXCEPTION_HANDLERS, e)
+        or _DEFAULT_EXCEPTION_HANDLER
+    )
 
     # Format the error details appropriately based on the exception type
-    if isinstance(e, TaskRevokedError):
-        error_details = f"Task was revoked: {str(e)}"
-        log_error(error_category, error_details, include_stack_trace=False)
-    elif isinstance(e, redis.RedisError):
-        error_details = f"Redis communication error: {str(e)}"
-        log_error(error_category, error_details)
-    elif isinstance(e, CeleryTimeoutError):
-        error_details = f"Task execution timed out: {str(e)}"
-        log_error(error_category, error_details)
-    elif isinstance(e, (TaskCreationError, TaskChainingError)):
-        error_details = str(e)
-        log_error(error_category, error_details)
-    elif isinstance(e, CeleryError):
-        phase = "chaining tasks" if sentiment_task else "creating task"
-        error_details = f"Celery error while {phase}: {str(e)}"
-        log_error(error_category, error_details)
-    elif isinstance(e, ValueError):
-        error_details = str(e)
-        log_error(error_category, error_details)
-    else:
-        error_details = f"Unexpected error: {str(e)}"
-        log_error(error_category, error_details)
+    error_details, include_stack_trace = formatter(e)
+    log_error(error_category, error_details, include_stack_trace=include_stack_trace)
 
     return error_category, error_details
 
 
-@contextlib.contextmanager
-def manage_tasks():
-    """
-    Context manager for safely handling Celery tasks.
-    Ensures tasks are properly revoked if an exception occurs.
+# Errors from revoking tasks that are worth retrying
+_RETRYABLE_REVOKE_ERRORS = (redis.RedisError, ConnectionError, TimeoutError)
 
-    Usage:
-        with manage_tasks() as task_manager:
-            task_manager.sentiment_task = some_task.apply_async()
-            task_manager.task_chain = task_manager.sentiment_task.then(next_task)
-    """
-
-    class TaskManager:
-        def __init__(self):
-            self.sentiment_task = None
-            self.task_chain = None
-            self._revocation_metrics = {
-                "attempts": 0,
-                "failures": 0,
-                "connection_errors": 0,
-                "timeout_errors": 0,
-                "other_errors": 0,
-            }
-
-        @property
-        def revocation_metrics(self):
-            """Provide read-only access to revocation metrics"""
-            return self._revocation_metrics.copy()
-
-        def revoke_tasks(self):
-            """
-            Revoke any active tasks with specific exception handling and metrics.
-            Uses retry pattern for connection errors.
-            """
-            tasks_to_revoke = []
-
-            if self.sentiment_task:
-                tasks_to_revoke.append(("sentiment_task", self.sentiment_task))
-
-            if self.task_chain:
-                tasks_to_revoke.append(("task_chain", self.task_chain))
-
-            if not tasks_to_revoke:
-                return  # No tasks to revoke
-
-            for task_name, task in tasks_to_revoke:
-                self._revoke_single_task(task_name, task)
-
-        def _revoke_single_task(self, task_name, task, max_retries=2, retry_delay=0.5):
-            """Revoke a single task with retry logic for connection issues"""
-            self._revocation_metrics["attempts"] += 1
-            retries = 0
-
-            while retries <= max_retries:
-                try:
-                    logger.info(f"Revoking {task_name}: {task.id}")
-                    task.revoke(terminate=True)
-                    return  # Success, no need to retry
-
-                except (redis.RedisError, ConnectionError) as e:
-                    # Connection-specific errors that might be transient
-                    retries += 1
-                    self._revocation_metrics["connection_errors"] += 1
-
-                    if retries <= max_retries:
-                        logger.warning(
-                            f"Connection error when revoking {task_name} (attempt {retries}/{max_retries}): {str(e)}. Retrying in {retry_delay}s"
-                        )
-                        time.sleep(retry_delay)  # Wait before retry
-                    else:
-                        logger.error(
-                            f"Failed to revoke {task_name} after {max_retries} retries: {str(e)}"
-                        )
-                        self._revocation_metrics["failures"] += 1
-                        # Consider alternative cleanup like marking in a "zombie tasks" table for later cleanup
 
-                except TimeoutError as e:
-                    # Timeout errors might be resolved with retry
-                    retries += 1
-                    self._revocation_metrics["timeout_errors"] += 1
+class TaskManager:
+    """Tracks the Celery task created for a request and revokes it on failure."""
 
-                    if retries <= max_retries:
-                        logger.warning(
-                            f"Timeout when revoking {task_name} (attempt {retries}/{max_retries}): {str(e)}. Retrying in {retry_delay}s"
-                        )
-                        time.sleep(retry_delay)  # Wait before retry
-                    else:
-                        logger.error(
-                            f"Timeout revoking {task_name} after {max_retries} retries: {str(e)}"
-                        )
-                        self._revocation_metrics["failures"] += 1
+    def __init__(self):
+        self.task = None
+        self._revocation_metrics = {
+            "attempts": 0,
+            "failures": 0,
+            "connection_errors": 0,
+            "timeout_errors": 0,
+            "other_errors": 0,
+        }
+
+    @property
+    def revocation_metrics(self):
+        """Provide read-only access to revocation metrics"""
+        return self._revocation_metrics.copy()
 
-                except Exception as e:
-                    # Other unexpected errors - log with more detail but don't retry
+    async def revoke_tasks(self):
+        """
+        Revoke any active tasks with specific exception handling and metrics.
+        Uses retry pattern for connection errors.
+        """
+        if not self.task:
+            return  # No task to revoke
+
+        await self._revoke_task_ids([self.task.id])
+
+    @staticmethod
+    def _backoff_delay(retry_delay, retries, max_delay=5.0):
+        """Exponential backoff with jitter so concurrent retries don't align"""
+        delay = retry_delay * (2 ** (retries - 1)) * random.uniform(0.5, 1.5)
+        return min(delay, max_delay)
+
+    async def _revoke_task_ids(self, task_ids, max_retries=2, retry_delay=0.5):
+        """Revoke tasks in a single control broadcast, retrying connection issues"""
+        self._revocation_metrics["attempts"] += 1
+
+        for attempt in range(max_retries + 1):
+            try:
+                logger.info("Revoking tasks: %s", task_ids)
+                # revoke() publishes to the broker synchronously; keep it off the loop
+                await asyncio.to_thread(
+                    celery_app.control.revoke, task_ids, terminate=True
+                )
+                return  # Success, no need to retry
+
+            except _RETRYABLE_REVOKE_ERRORS as e:
+                # Connection and timeout errors might be transient
+                error_kind = (
+                    "timeout" if isinstance(e, TimeoutError) else "connection"
+                )
+                self._revocation_metrics[f"{error_kind}_errors"] += 1
+
+                if attempt == max_retries:
                     logger.error(
-                        f"Error revoking {task_name} ({type(e).__name__}): {str(e)}"
-                    )
-                    logger.debug(
-                        f"Full traceback for {task_name} revocation error:",
-                        exc_info=True,
+                        "Failed to revoke tasks %s after %d retries (%s error): %s",
+                        task_ids,
+                        max_retries,
+                        error_kind,
+                        e,
                     )
                     self._revocation_metrics["failures"] += 1
-                    self._revocation_metrics["other_errors"] += 1
-                    break  # Don't retry for other types of errors
+                    # Consider alternative cleanup like marking in a "zombie tasks" table for later cleanup
+                    return
+
+                sleep_for = self._backoff_delay(retry_delay, attempt + 1)
+                logger.warning(
+                    "%s error when revoking tasks %s (attempt %d/%d): %s. Retrying in %.2fs",
+                    error_kind.capitalize(),
+                    task_ids,
+                    attempt + 1,
+                    max_retries,
+                    e,
+                    sleep_for,
+                )
+                await asyncio.sleep(sleep_for)  # Wait before retry
+
+            except Exception as e:
+                # Other unexpected errors - log with more detail but don't retry
+                logger.error(
+                    "Error revoking tasks %s (%s): %s", task_ids, type(e).__name__, e
+                )
+                logger.debug(
+                    "Full traceback for tasks %s revocation error:",
+                    task_ids,
+                    exc_info=True,
+                )
+                self._revocation_metrics["failures"] += 1
+                self._revocation_metrics["other_errors"] += 1
+                return  # Don't retry for other types of errors
+
+
+@contextlib.asynccontextmanager
+async def manage_tasks():
+    """
+    Context manager for safely handling Celery tasks.
+    Ensures tasks are properly revoked if an exception occurs.
 
+    Usage:
+        async with manage_tasks() as task_manager:
+            task_manager.task = some_task.apply_async()
+    """
     manager = TaskManager()
     try:
         yield manager
     except Exception:
         # Ensure tasks are revoked if an exception occurs
-        manager.revoke_tasks()
+        await manager.revoke_tasks()
 
         # Log metrics on revocation attempts
         if manager._revocation_metrics["attempts"] > 0:
-            logger.info(f"Task revocation metrics: {manager.revocation_metrics}")
+            logger.info("Task revocation metrics: %s", manager.revocation_metrics)
 
         raise
     finally:
         # Always ensure tasks are properly cleaned up, even without exceptions
         # This addresses potential resource leaks in normal execution flows
-        if manager.sentiment_task or manager.task_chain:
+        if manager.task:
             logger.debug("Performing final cleanup of task resources")
             # We don't need to revoke successful tasks, but we may need to perform other cleanup
             # For example, removing temporary files or closing connections
 
             # Log metrics if any revocations were attempted during cleanup
             if manager._revocation_metrics["attempts"] > 0:
-                logger.info(f"Task cleanup metrics: {manager.revocation_metrics}")
+                logger.info("Task cleanup metrics: %s", manager.revocation_metrics)
+
+
+async def wait_for_task_result(
+    task: AsyncResult, timeout: float, poll_interval: float = 0.1
+) -> Any:
+    """
+    Wait for a Celery task to finish without blocking the event loop.
+
+    Polls the result backend instead of calling the blocking AsyncResult.get
+    with a timeout, so other requests are served while the task runs.
+
+    Args:
+        task: The task result to wait for
+        timeout: Maximum time to wait in seconds
+        poll_interval: Delay between result backend checks in seconds
+
+    Returns:
+        The task result; exceptions raised by the task are returned, not raised
+
+    Raises:
+        asyncio.TimeoutError: If the task does not finish within the timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not task.ready():
+        if loop.time() >= deadline:
+            raise asyncio.TimeoutError(f"Task {task.id} did not finish in {timeout}s")
+        await asyncio.sleep(poll_interval)
+    return task.get(propagate=False)
 
 
 async def get_tao_dividends(
@@ -309,93 +378,183 @@ async def get_tao_dividends(
     try:
         result = await blockchain_service.get_tao_dividends(netuid, hotkey)
 
-        # Store the dividend data in the database
-        if result and "dividend" in result:
-            try:
-                # Store the result in the database
-                await store_dividend_data(
-                    netuid=netuid if netuid is not None else settings.DEFAULT_NETUID,
-                    hotkey=hotkey if hotkey is not None else settings.DEFAULT_HOTKEY,
-                    dividend=result.get("dividend", 0),
-                )
-                logger.info(
-                    f"Dividend data stored in database for netuid={netuid}, hotkey={hotkey}"
-                )
-            except Exception as db_error:
-                logger.error(
-                    f"Error storing dividend data in database: {str(db_error)}"
-                )
-                # Don't fail the query just because DB storage failed
-                # Just continue with the result
-
         return result
     except Exception as e:
-        logger.error(f"Error querying blockchain: {str(e)}", exc_info=True)
+        logger.error("Error querying blockchain: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Error querying blockchain: {str(e)}",
         )
 
 
-@router.get("/tao_dividends")
-async def tao_dividends_endpoint(
-    netuid: Optional[int] = Query(None, description="Subnet ID"),
-    hotkey: Optional[str] = Query(None, description="Account hotkey"),
-    trade: bool = Query(False, description="Trigger sentiment analysis and staking"),
-    wait_for_results: bool = Query(False, description="Wait for task completion"),
-    timeout: Optional[float] = Query(
-        None,
-        description="Timeout in seconds for waiting for task results (default: 20)",
-    ),
-    api_key: str = Depends(get_api_key_from_header),
-):
+async def store_tao_dividends(
+    netuid: Optional[int], hotkey: Optional[str], result: Dict[str, Any]
+) -> None:
     """
-    Primary endpoint for Tao dividends with advanced features.
+    Store a single-hotkey dividend query result in the database.
+    Storage errors are logged but never fail the request.
 
-    This endpoint combines and extends the functionality of the other tao_dividends endpoints:
-    - Provides cached access to dividend data (like /tao_dividends_cached)
-    - Optionally triggers sentiment analysis and staking via background tasks
+    Args:
+        netuid: Optional subnet ID
+        hotkey: Optional account hotkey
+        result: Dividend data returned by get_tao_dividends
+    """
+    if not result or "dividend" not in result:
+        return
 
-    Parameters:
-    - netuid: Optional subnet ID (defaults to DEFAULT_NETUID from config)
-    - hotkey: Optional account hotkey (defaults to DEFAULT_HOTKEY from config)
-    - trade: If True, triggers sentiment analysis and staking background tasks
-    - wait_for_results: If True and trade is True, waits for task completion
-    - timeout: Maximum time to wait for task results in seconds (default: 20s)
+    try:
+        await store_dividend_data(
+            netuid=netuid if netuid is not None else _DEFAULT_NETUID,
+            hotkey=hotkey if hotkey is not None else _DEFAULT_HOTKEY,
+            dividend=result.get("dividend", 0),
+        )
+        logger.info(
+            "Dividend data stored in database for netuid=%s, hotkey=%s",
+            netuid,
+            hotkey,
+        )
+    except Exception as db_error:
+        logger.error("Error storing dividend data in database: %s", db_error)
+
+
+async def _fetch_and_cache_tao_dividends(
+    netuid: int, hotkey: str, cache_key: str
+) -> Dict[str, Any]:
+    """
+    Query Tao dividends from the blockchain and store the result in the database
+    and cache. A failure is briefly remembered in the cache so other requests
+    don't repeat the query.
+    """
+    try:
+        result = await get_tao_dividends(netuid, hotkey)
+        # Store the result in the database in the background so the response
+        # doesn't wait for the insert batch to be written
+        write_task = asyncio.create_task(store_tao_dividends(netuid, hotkey, result))
+        _background_writes.add(write_task)
+        write_task.add_done_callback(_background_writes.discard)
+        # The cache holds the complete response for a plain cache hit so that
+        # it can be served without being decoded and re-encoded
+        await cache_service.cache_data(
+            cache_key, {**result, "cached": True, "stake_tx_triggered": False}
+        )
+    except Exception:
+        await cache_service.mark_failed(cache_key)
+        raise
+    return result
+
+
+def _forget_inflight_query(cache_key: str, task: asyncio.Task) -> None:
+    """Remove a finished query from the in-flight table."""
+    if _inflight_queries.get(cache_key) is task:
+        del _inflight_queries[cache_key]
+    # Retrieve the exception in case every waiting request was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def fetch_tao_dividends_coalesced(
+    netuid: int, hotkey: str, cache_key: str
+) -> Dict[str, Any]:
+    """
+    Query and cache Tao dividends on a cache miss, coalescing concurrent requests.
+
+    The first request for a given (netuid, hotkey) starts the query as a separate
+    task; it and any concurrent requests for the same key await that task. The
+    task isn't tied to any one request, so a cancelled request doesn't cancel the
+    query for the others.
+
+    Args:
+        netuid: Subnet ID
+        hotkey: Account hotkey
+        cache_key: Cache key for the (netuid, hotkey) pair
 
     Returns:
-    - Dividend data with cache status
-    - If trade=True, includes information about triggered background tasks
-    - If wait_for_results=True, includes task results (or timeout status)
+        A copy of the dividend data that the caller is free to modify
+    """
+    task = _inflight_queries.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(
+            _fetch_and_cache_tao_dividends(netuid, hotkey, cache_key)
+        )
+        _inflight_queries[cache_key] = task
+        task.add_done_callback(lambda done: _forget_inflight_query(cache_key, done))
+    return dict(await asyncio.shield(task))
+
+
+async def _tao_dividends_impl(
+    netuid: Optional[int],
+    hotkey: Optional[str],
+    trade: bool = False,
+    wait_for_results: bool = False,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Shared implementation of the tao_dividends endpoints.
+
+    Takes plain values rather than Query/Depends parameters so that other
+    endpoints can call it directly without re-resolving dependencies.
     """
     # Use default values if not provided
-    actual_netuid = netuid if netuid is not None else settings.DEFAULT_NETUID
-    actual_hotkey = hotkey if hotkey is not None else settings.DEFAULT_HOTKEY
+    actual_netuid = netuid if netuid is not None else _DEFAULT_NETUID
+    actual_hotkey = hotkey if hotkey is not None else _DEFAULT_HOTKEY
     actual_timeout = (
         timeout if timeout is not None else 20.0
     )  # Default timeout of 20 seconds
 
-    # Try to get from cache first
-    cached_result = cache_service.get_cached_data(actual_netuid, actual_hotkey)
+    # Try to get from cache first; on a miss this also marks the key as being
+    # queried so other workers wait for this request instead of repeating it
+    cache_key = cache_service.get_cache_key(actual_netuid, actual_hotkey)
+    is_default_pair = (
+        actual_netuid == _DEFAULT_NETUID and actual_hotkey == _DEFAULT_HOTKEY
+    )
+    cached_payload = _get_default_dividends_payload() if is_default_pair else None
+
+    if cached_payload is None:
+        cached_payload = await cache_service.get_or_mark_pending(cache_key)
+
+        if cached_payload == PENDING_SENTINEL and cache_key not in _inflight_queries:
+            # Another worker is querying this key; wait briefly for its result
+            cached_payload = await cache_service.wait_for_pending(cache_key)
 
-    if cached_result:
-        # Data found in cache
-        result = {**cached_result, "cached": True}
+        if is_default_pair and cached_payload not in (
+            None,
+            PENDING_SENTINEL,
+            ERROR_SENTINEL,
+        ):
+            _set_default_dividends_payload(cached_payload)
+
+    if cached_payload == ERROR_SENTINEL:
+        # A recent query for this key failed; don't hit the blockchain again yet
+        return ORJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "error": ErrorCategory.BLOCKCHAIN_ERROR,
+                "detail": "Blockchain query failed recently, retry later",
+                "netuid": actual_netuid,
+                "hotkey": actual_hotkey,
+            },
+        )
+
+    if cached_payload and cached_payload != PENDING_SENTINEL:
+        if not trade:
+            # The cached payload is already the complete response for a plain hit
+            return Response(content=cached_payload, media_type="application/json")
+        # Data found in cache, already flagged as cached
+        result = orjson.loads(cached_payload)
     else:
-        # Cache miss - query from blockchain
+        # Cache miss - query from blockchain and cache the result
         try:
-            result = await get_tao_dividends(actual_netuid, actual_hotkey)
-
-            # Cache the result
-            cache_service.cache_data(actual_netuid, actual_hotkey, result)
+            result = await fetch_tao_dividends_coalesced(
+                actual_netuid, actual_hotkey, cache_key
+            )
             result["cached"] = False
         except Exception as e:
             # Handle blockchain query errors
-            error_category = ERROR_CATEGORIES["BLOCKCHAIN_ERROR"]
+            error_category = ErrorCategory.BLOCKCHAIN_ERROR
             error_details = f"Error querying blockchain: {str(e)}"
             log_error(error_category, error_details)
 
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 content={
                     "error": error_category,
@@ -407,107 +566,56 @@ async def tao_dividends_endpoint(
 
     # If trade is true, trigger sentiment analysis and staking background tasks
     if trade:
-        with manage_tasks() as task_manager:
+        async with manage_tasks() as task_manager:
             try:
-                # Define the first task (sentiment analysis)
-                sentiment_signature = analyze_twitter_sentiment_task.s(
-                    actual_netuid, actual_hotkey
-                ).set(
-                    time_limit=10,  # 10 seconds timeout for sentiment analysis
-                    soft_time_limit=8,  # Soft timeout to allow for graceful handling
-                )
-
-                # Define the second task (blockchain processing)
-                blockchain_signature = process_stake_based_on_sentiment_task.s(
-                    actual_netuid, actual_hotkey
+                # Sentiment analysis and staking run in a single task, so the
+                # sentiment result doesn't take an extra trip through the broker
+                task_manager.task = celery_app.signature(
+                    "analyze_and_stake", args=(actual_netuid, actual_hotkey)
                 ).set(
-                    time_limit=15,  # 15 seconds timeout for blockchain operation
-                    soft_time_limit=12,  # Soft timeout for graceful handling
-                )
-
-                # Create the chain
-                task_chain_result = chain(
-                    sentiment_signature, blockchain_signature
+                    # The task caps sentiment analysis at 8s, leaving the rest
+                    # of these limits for the blockchain operation
+                    time_limit=25,
+                    soft_time_limit=20,  # Soft timeout for graceful handling
                 ).apply_async()
 
-                if not task_chain_result:
-                    raise TaskChainingError("Failed to create task chain")
-
-                # task_chain_result is an AsyncResult; its id is the id of the *last* task
-                task_manager.task_chain = task_chain_result
-                # Keep track of the first task's result if needed for individual monitoring/revocation
-                # Note: task_chain_result.parent gives the result of the previous task in the chain
-                task_manager.sentiment_task = task_chain_result.parent
-
-                # Store reference to the full chain for proper monitoring
-                # The AsyncResult returned by chain() represents the final task
-                chain_result = task_manager.task_chain
-                task_manager.full_chain = chain_result  # Redundant? task_chain already holds this. Let's keep task_chain as the main reference.
-
-                # Track the chain lineage with a depth limit to avoid excessive traversal
-                chain_lineage = []
-                current_task = chain_result
-                depth = 0
-                max_depth = 10  # Reasonable limit for most practical chains
-
-                while current_task and current_task.parent and depth < max_depth:
-                    chain_lineage.append(current_task.id)
-                    # Access the parent AsyncResult correctly
-                    parent_result = (
-                        AsyncResult(current_task.parent.id)
-                        if current_task.parent
-                        else None
+                if not task_manager.task:
+                    raise TaskCreationError(
+                        "Failed to create sentiment and staking task"
                     )
-                    current_task = parent_result
-                    depth += 1
 
-                # Add the root task ID if it exists and wasn't added
-                if current_task and current_task.id not in chain_lineage:
-                    chain_lineage.append(current_task.id)
-
-                if depth >= max_depth and current_task and current_task.parent:
-                    logger.warning(
-                        f"Chain lineage traversal stopped at depth {max_depth}. Chain may be longer than expected."
-                    )
-
-                logger.debug(
-                    f"Task chain lineage (depth: {depth}): {chain_lineage[::-1]}"
-                )  # Reverse to show in execution order
+                logger.debug("Task ID: %s", task_manager.task.id)
 
                 result["stake_tx_triggered"] = True
+                # Both stages run in one task under the same limits; the
+                # sentiment stage is additionally capped at 8s within it
                 result["task_timeouts"] = {
-                    "sentiment_analysis": "8s soft, 10s hard",
-                    "blockchain_operation": "12s soft, 15s hard",
+                    "sentiment_analysis": "20s soft, 25s hard (8s cap)",
+                    "blockchain_operation": "20s soft, 25s hard",
                 }
 
                 # Log successful task creation
                 logger.info(
-                    f"Triggered sentiment analysis and staking for netuid={actual_netuid}, hotkey={actual_hotkey}"
-                )
-                # Safely access task IDs
-                sentiment_task_id = getattr(task_manager.sentiment_task, "id", "N/A")
-                chain_id = getattr(
-                    task_manager.task_chain, "id", "N/A"
-                )  # This should now work
-                logger.debug(
-                    f"Task IDs: sentiment_task.id={sentiment_task_id}, chain_id={chain_id}"
+                    "Triggered sentiment analysis and staking for netuid=%s, hotkey=%s",
+                    actual_netuid,
+                    actual_hotkey,
                 )
 
                 # If wait_for_results is True, wait for tasks to complete with timeout
                 if wait_for_results:
                     try:
                         logger.info(
-                            f"Waiting for task completion with timeout={actual_timeout}s"
+                            "Waiting for task completion with timeout=%ss",
+                            actual_timeout,
                         )
                         result["task_wait"] = {
                             "enabled": True,
                             "timeout": actual_timeout,
                         }
 
-                        # Wait for the final task in the chain to complete
-                        task_result = task_manager.task_chain.get(
-                            timeout=actual_timeout,
-                            propagate=False,  # Don't raise exceptions from the task
+                        # Wait for the task to complete
+                        task_result = await wait_for_task_result(
+                            task_manager.task, actual_timeout
                         )
 
                         # Add task results to the response
@@ -521,61 +629,43 @@ async def tao_dividends_endpoint(
                     except asyncio.TimeoutError:
                         # Handle asyncio timeout
                         logger.warning(
-                            f"Asyncio timeout waiting for task completion after {actual_timeout}s"
+                            "Asyncio timeout waiting for task completion after %ss",
+                            actual_timeout,
                         )
                         result["task_completed"] = False
                         result["task_timeout"] = True
                         result["task_error"] = f"Timed out after {actual_timeout}s"
-                        return JSONResponse(
-                            status_code=status.HTTP_504_GATEWAY_TIMEOUT, content=result
-                        )
-
-                    except CeleryTimeoutError:
-                        # Handle Celery timeout
-                        logger.warning(
-                            f"Celery timeout waiting for task completion after {actual_timeout}s"
-                        )
-                        result["task_completed"] = False
-                        result["task_timeout"] = True
-                        result["task_error"] = (
-                            f"Celery task timed out after {actual_timeout}s"
-                        )
-                        return JSONResponse(
+                        return ORJSONResponse(
                             status_code=status.HTTP_504_GATEWAY_TIMEOUT, content=result
                         )
 
                     except Exception as e:
                         # Handle other exceptions during task wait
-                        logger.error(f"Error waiting for task result: {str(e)}")
+                        logger.error("Error waiting for task result: %s", e)
                         result["task_completed"] = False
                         result["task_error"] = f"Error retrieving task result: {str(e)}"
-                        return JSONResponse(
+                        return ORJSONResponse(
                             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             content=result,
                         )
                 else:
-                    # Not waiting for results, just include task IDs
+                    # Not waiting for results, just include the task ID
+                    task_id = task_manager.task.id
+                    result["task_id"] = task_id
+                    # Deprecated: both stages now run in the task above
                     result["task_ids"] = {
-                        "sentiment_task_id": sentiment_task_id,
-                        "chain_task_id": chain_id,
+                        "sentiment_task_id": task_id,
+                        "chain_task_id": task_id,
                     }
 
             except Exception as e:
                 # Use the helper function to handle the error
-                error_category, error_details = handle_task_error(
-                    e, task_manager.sentiment_task, task_manager.task_chain
-                )
+                error_category, error_details = await handle_task_error(e, task_manager)
 
                 # Determine appropriate status code based on the error type
-                # Default status code is 500, only set different codes for special cases
-                status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-                if error_category == ERROR_CATEGORIES["REDIS_ERROR"]:
-                    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-                elif error_category == ERROR_CATEGORIES["TIMEOUT_ERROR"]:
-                    status_code = status.HTTP_504_GATEWAY_TIMEOUT
-                elif error_category == ERROR_CATEGORIES["TASK_REVOKED"]:
-                    status_code = status.HTTP_409_CONFLICT
-                # No need for explicit 500 cases since that's our default
+                status_code = _CATEGORY_STATUS_CODES.get(
+                    error_category, status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
 
                 # Create error response
                 error_response = {
@@ -586,18 +676,58 @@ async def tao_dividends_endpoint(
                 }
 
                 # Return with appropriate status code
-                return JSONResponse(status_code=status_code, content=error_response)
+                return ORJSONResponse(status_code=status_code, content=error_response)
     else:
         result["stake_tx_triggered"] = False
 
     return result
 
 
+@router.get("/tao_dividends")
+async def tao_dividends_endpoint(
+    netuid: Optional[int] = Query(None, description="Subnet ID"),
+    hotkey: Optional[str] = Query(None, description="Account hotkey"),
+    trade: bool = Query(False, description="Trigger sentiment analysis and staking"),
+    wait_for_results: bool = Query(False, description="Wait for task completion"),
+    timeout: Optional[float] = Query(
+        None,
+        description="Timeout in seconds for waiting for task results (default: 20)",
+    ),
+    api_key: str = API_KEY_DEP,
+):
+    """
+    Primary endpoint for Tao dividends with advanced features.
+
+    This endpoint combines and extends the functionality of the other tao_dividends endpoints:
+    - Provides cached access to dividend data (like /tao_dividends_cached)
+    - Optionally triggers sentiment analysis and staking via background tasks
+
+    Parameters:
+    - netuid: Optional subnet ID (defaults to DEFAULT_NETUID from config)
+    - hotkey: Optional account hotkey (defaults to DEFAULT_HOTKEY from config)
+    - trade: If True, triggers sentiment analysis and staking background tasks
+    - wait_for_results: If True and trade is True, waits for task completion
+    - timeout: Maximum time to wait for task results in seconds (default: 20s)
+
+    Returns:
+    - Dividend data with cache status
+    - If trade=True, includes information about triggered background tasks
+    - If wait_for_results=True, includes task results (or timeout status)
+    """
+    return await _tao_dividends_impl(
+        netuid=netuid,
+        hotkey=hotkey,
+        trade=trade,
+        wait_for_results=wait_for_results,
+        timeout=timeout,
+    )
+
+
 @router.get("/tao_dividends_cached", deprecated=True)
 async def get_tao_dividends_with_cache(
     netuid: Optional[int] = Query(None, description="Subnet ID"),
     hotkey: Optional[str] = Query(None, description="Account hotkey"),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     DEPRECATED: Use /tao_dividends instead.
@@ -609,21 +739,23 @@ async def get_tao_dividends_with_cache(
     logger.warning(
         "Deprecated endpoint /tao_dividends_cached was called. Use /tao_dividends instead."
     )
-    return await tao_dividends_endpoint(netuid=netuid, hotkey=hotkey, api_key=api_key)
+    return await _tao_dividends_impl(netuid=netuid, hotkey=hotkey)
 
 
 @router.get("/tao_dividends_no_cache")
 async def get_tao_dividends_without_cache(
     netuid: Optional[int] = Query(None, description="Subnet ID"),
     hotkey: Optional[str] = Query(None, description="Account hotkey"),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Get Tao dividends directly without using cache.
     Always performs a fresh blockchain query.
     """
     # Directly query from blockchain
-    return await get_tao_dividends(netuid, hotkey)
+    result = await get_tao_dividends(netuid, hotkey)
+    await store_tao_dividends(netuid, hotkey, result)
+    return result
 
 
 @router.post("/purge_cache")
@@ -632,13 +764,15 @@ async def purge_cache_endpoint(
     hotkey: Optional[str] = Query(
         None, description="Account hotkey to purge cache for"
     ),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Purge cache for specific netuid/hotkey combination.
     If both are None, purges all tao_dividend cache entries.
     """
-    success = cache_service.purge_cache(netuid, hotkey)
+    success = await cache_service.purge_cache(netuid, hotkey)
+    # Also drop this process's copy of the default pair's response
+    _set_default_dividends_payload(None)
 
     if success:
         if netuid is None and hotkey is None:
@@ -655,7 +789,7 @@ async def get_dividend_history_endpoint(
     netuid: Optional[int] = Query(None, description="Filter by Subnet ID"),
     hotkey: Optional[str] = Query(None, description="Filter by account hotkey"),
     limit: int = Query(100, description="Maximum number of records to return"),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Retrieve dividend history from the database.
@@ -669,10 +803,14 @@ async def get_dividend_history_endpoint(
     - List of dividend history records
     """
     try:
-        history = await get_dividend_history(netuid=netuid, hotkey=hotkey, limit=limit)
+        cache_key = f"dividend_history:netuid:{netuid}:hotkey:{hotkey}:limit:{limit}"
+        history = await cache_service.get_or_fetch(
+            cache_key,
+            lambda: get_dividend_history(netuid=netuid, hotkey=hotkey, limit=limit),
+        )
         return history
     except Exception as e:
-        logger.error(f"Error retrieving dividend history: {str(e)}", exc_info=True)
+        logger.error("Error retrieving dividend history: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving dividend history: {str(e)}",
@@ -682,7 +820,7 @@ async def get_dividend_history_endpoint(
 @router.get("/sentiment_history", response_model=Dict[str, Any])
 async def get_sentiment_history_endpoint(
     netuid: int = Query(..., description="Subnet ID to get sentiment for"),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Retrieve the latest sentiment analysis for a specific subnet.
@@ -705,7 +843,7 @@ async def get_sentiment_history_endpoint(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving sentiment data: {str(e)}", exc_info=True)
+        logger.error("Error retrieving sentiment data: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving sentiment data: {str(e)}",
@@ -720,7 +858,7 @@ async def get_stake_history_endpoint(
         None, description="Filter by action type (stake/unstake)"
     ),
     limit: int = Query(100, description="Maximum number of records to return"),
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Retrieve staking action history from the database.
@@ -738,12 +876,19 @@ async def get_stake_history_endpoint(
         # We need to implement this function in mongo.py
         from app.db.mongo import get_stake_history
 
-        history = await get_stake_history(
-            netuid=netuid, hotkey=hotkey, action_type=action_type, limit=limit
+        cache_key = (
+            f"stake_history:netuid:{netuid}:hotkey:{hotkey}"
+            f":action_type:{action_type}:limit:{limit}"
+        )
+        history = await cache_service.get_or_fetch(
+            cache_key,
+            lambda: get_stake_history(
+                netuid=netuid, hotkey=hotkey, action_type=action_type, limit=limit
+            ),
         )
         return history
     except Exception as e:
-        logger.error(f"Error retrieving stake history: {str(e)}", exc_info=True)
+        logger.error("Error retrieving stake history: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving stake history: {str(e)}",
@@ -752,7 +897,7 @@ async def get_stake_history_endpoint(
 
 @router.get("/db_stats")
 async def get_database_stats_endpoint(
-    api_key: str = Depends(get_api_key_from_header),
+    api_key: str = API_KEY_DEP,
 ):
     """
     Get database statistics and collection counts.
@@ -764,10 +909,10 @@ async def get_database_stats_endpoint(
         # We need to implement this function in mongo.py
         from app.db.mongo import get_database_stats
 
-        stats = await get_database_stats()
+        stats = await cache_service.get_or_fetch("db_stats", get_database_stats)
         return stats
     except Exception as e:
-        logger.error(f"Error retrieving database stats: {str(e)}", exc_info=True)
+        logger.error("Error retrieving database stats: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving database stats: {str(e)}",
@@ -1,3 +1,5 @@
+import hmac
+
 from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import APIKeyHeader
 from app.core.config import settings
@@ -5,6 +7,9 @@ from app.core.config import settings
 # API key header extractor
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Expected API key, encoded once for constant-time comparison
+_API_KEY_BYTES = settings.API_KEY.encode("utf-8") if settings.API_KEY else None
+
 
 async def get_api_key_from_header(api_key_header: str = Security(API_KEY_HEADER)):
     """
@@ -16,7 +21,13 @@ async def get_api_key_from_header(api_key_header: str = Security(API_KEY_HEADER)
             detail="API Key header is missing",
         )
 
-    if api_key_header != settings.API_KEY:
+    if _API_KEY_BYTES is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="API Key is not configured on the server",
+        )
+
+    if not hmac.compare_digest(api_key_header.encode("utf-8"), _API_KEY_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API Key",
@@ -1,26 +1,37 @@
 import os
-from pydantic import BaseModel
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, computed_field
 
 
 class Settings(BaseModel):
+    # Settings are read from the environment once and never change afterwards
+    model_config = ConfigDict(frozen=True)
+
     # API authentication
     API_KEY: str = os.getenv("API_KEY", "")
 
     # Redis settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 
     # Separate Redis databases for Celery broker and backend
     REDIS_BROKER_DB: int = int(os.getenv("REDIS_BROKER_DB", "0"))
     REDIS_BACKEND_DB: int = int(os.getenv("REDIS_BACKEND_DB", "1"))
-    REDIS_BROKER_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_BROKER_DB}"
-    REDIS_BACKEND_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_BACKEND_DB}"
+
+    # Maximum number of pooled connections shared by the cache service
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
 
     # Cache settings
     CACHE_TTL_SECONDS: int = int(
         os.getenv("CACHE_TTL_SECONDS", "120")
     )  # 2 minutes cache TTL
+    # Short-lived markers for dividend queries in progress or recently failed
+    CACHE_PENDING_TTL_SECONDS: int = int(os.getenv("CACHE_PENDING_TTL_SECONDS", "3"))
+    CACHE_ERROR_TTL_SECONDS: int = int(os.getenv("CACHE_ERROR_TTL_SECONDS", "30"))
+    # Sentiment changes slowly, so recent results are reused for stake decisions
+    SENTIMENT_CACHE_TTL_SECONDS: int = int(
+        os.getenv("SENTIMENT_CACHE_TTL_SECONDS", "120")
+    )
 
     # Default values for the API
     DEFAULT_NETUID: int = int(os.getenv("DEFAULT_NETUID", "18"))
@@ -28,6 +39,11 @@ class Settings(BaseModel):
         "DEFAULT_HOTKEY", "5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v"
     )
 
+    # Seconds the default netuid/hotkey dividends are kept in process memory
+    DEFAULT_DIVIDENDS_TTL_SECONDS: float = float(
+        os.getenv("DEFAULT_DIVIDENDS_TTL_SECONDS", "5")
+    )
+
     # Bittensor settings
     BITTENSOR_NETWORK: str = os.getenv("BITTENSOR_NETWORK", "test")
     BITTENSOR_WALLET_NAME: str = os.getenv("BITTENSOR_WALLET_NAME", "default")
@@ -38,5 +54,27 @@ class Settings(BaseModel):
     DATURA_API_KEY: str = os.getenv("DATURA_API_KEY", "")
     CHUTES_API_KEY: str = os.getenv("CHUTES_API_KEY", "")
 
+    # Redis URLs are derived from the fields above so they follow any overrides
+    @computed_field
+    @property
+    def REDIS_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
+
+    @computed_field
+    @property
+    def REDIS_BROKER_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_BROKER_DB}"
+
+    @computed_field
+    @property
+    def REDIS_BACKEND_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_BACKEND_DB}"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings instance."""
+    return Settings()
+
 
-settings = Settings()
+settings = get_settings()
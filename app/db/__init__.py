@@ -6,6 +6,7 @@ from .mongo import (
     get_db_client,
     get_db,
     close_db_connection,
+    ensure_indexes,
     store_dividend_data,
     get_dividend_history,
     record_stake_action,
@@ -18,6 +19,7 @@ __all__ = [
     "get_db_client",
     "get_db",
     "close_db_connection",
+    "ensure_indexes",
     "store_dividend_data",
     "get_dividend_history",
     "record_stake_action",
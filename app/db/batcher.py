@@ -0,0 +1,93 @@
+"""
+Coalesces concurrent single-document inserts into batched insert_many calls.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError, WriteError
+
+
+class InsertBatcher:
+    """
+    Collects documents submitted within a short window and inserts them with a
+    single unordered insert_many. Each submitter gets back its own inserted ID,
+    or the error for its own document if only some of the batch was rejected.
+
+    A batcher is bound to the event loop it is first used on, so it must only
+    be used from a single loop. It is only wired up for the API's
+    store_dividend_data.
+    """
+
+    def __init__(
+        self,
+        get_collection: Callable[[], Awaitable[Any]],
+        max_batch_size: int = 500,
+        max_delay: float = 0.02,
+    ):
+        self.get_collection = get_collection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(self, document: Dict[str, Any]) -> str:
+        """Queue a document for insertion and wait for its inserted ID."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((document, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_delay())
+
+        return await future
+
+    async def _flush_after_delay(self):
+        """Flush whatever has been queued once the batching window closes."""
+        await asyncio.sleep(self.max_delay)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Insert all queued documents now."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # insert_many sets each document's _id, including for documents that
+        # are inserted when others in the unordered batch are rejected
+        documents = [document for document, _ in batch]
+        write_errors: Dict[int, Dict[str, Any]] = {}
+        try:
+            collection = await self.get_collection()
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                # None of the writes can be confirmed
+                self._fail_all(batch, e)
+                return
+            write_errors = {
+                error["index"]: error for error in e.details.get("writeErrors", [])
+            }
+        except Exception as e:
+            self._fail_all(batch, e)
+            return
+
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+            error = write_errors.get(index)
+            if error is None:
+                future.set_result(str(document["_id"]))
+            else:
+                future.set_exception(
+                    WriteError(error.get("errmsg"), error.get("code"), error)
+                )
+
+    @staticmethod
+    def _fail_all(batch: List[Tuple[Dict[str, Any], asyncio.Future]], error):
+        """Fail every submitter in the batch with the same error."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
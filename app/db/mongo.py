@@ -3,44 +3,119 @@ MongoDB database connection and utility functions.
 Uses Motor as an asynchronous MongoDB driver.
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Dict, Any, Optional, List
 import os
 from datetime import datetime
 
+from .batcher import InsertBatcher
+from .models import TaoDividendModel, StakeActionModel, SentimentDataModel
+
 # MongoDB connection settings - should be moved to environment variables in production
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongo:27017")
 DB_NAME = os.getenv("MONGO_DB", "bittensor_app")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "200"))
+# Warm connections kept open by the API process so bursts of queries don't wait
+# on handshakes. Celery worker processes do at most one write per task and keep
+# no idle connections, since there can be dozens of them.
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "20"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "3000"))
 
 # Database collections
 DIVIDENDS_COLLECTION = "tao_dividends"
 STAKE_HISTORY_COLLECTION = "stake_history"
 SENTIMENT_COLLECTION = "twitter_sentiments"
 
-# MongoDB client instance
+# Read projections limited to the fields each collection's model defines
+# (plus _id), so stray fields never travel over the wire
+DIVIDEND_PROJECTION = dict.fromkeys(TaoDividendModel.model_fields, 1)
+STAKE_ACTION_PROJECTION = dict.fromkeys(StakeActionModel.model_fields, 1)
+SENTIMENT_PROJECTION = dict.fromkeys(SentimentDataModel.model_fields, 1)
+
+# MongoDB client and database instances
 _client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+
 
+async def get_db_client(min_pool_size: int = 0) -> AsyncIOMotorClient:
+    """
+    Get or create a MongoDB client.
 
-async def get_db_client() -> AsyncIOMotorClient:
-    """Get or create a MongoDB client."""
+    Args:
+        min_pool_size: Idle connections to keep open; only used by the call that
+            creates the client
+    """
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
+        _client = AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=min_pool_size,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_TIMEOUT_MS,
+        )
     return _client
 
 
-async def get_db():
-    """Get the database instance."""
-    client = await get_db_client()
-    return client[DB_NAME]
+async def get_db() -> AsyncIOMotorDatabase:
+    """Get the database instance, resolving it from the client only once."""
+    global _db
+    if _db is None:
+        _db = (await get_db_client())[DB_NAME]
+    return _db
+
+
+async def _get_dividends_collection():
+    """Get the dividends collection."""
+    db = await get_db()
+    return db[DIVIDENDS_COLLECTION]
+
+
+# Dividend inserts arriving within a few milliseconds are written together
+_dividend_batcher = InsertBatcher(_get_dividends_collection)
 
 
 async def close_db_connection():
     """Close the MongoDB connection."""
-    global _client
+    global _client, _db
+    # Write out any dividend inserts still waiting for their batch
+    await _dividend_batcher.flush()
     if _client is not None:
         _client.close()
         _client = None
+        _db = None
+
+
+def _serialize_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make a document returned by MongoDB JSON-serializable. ObjectId is the only
+    BSON type stored that JSON encoders don't handle natively (datetimes are).
+    """
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+    return document
+
+
+async def ensure_indexes():
+    """
+    Create the indexes used by the history queries, which filter on
+    netuid/hotkey and sort by newest first. No-op for existing indexes.
+    """
+    db = await get_db()
+    await asyncio.gather(
+        db[DIVIDENDS_COLLECTION].create_index(
+            [("netuid", 1), ("hotkey", 1), ("timestamp", -1)]
+        ),
+        db[DIVIDENDS_COLLECTION].create_index([("timestamp", -1)]),
+        db[STAKE_HISTORY_COLLECTION].create_index(
+            [("netuid", 1), ("hotkey", 1), ("action_type", 1), ("timestamp", -1)]
+        ),
+        db[STAKE_HISTORY_COLLECTION].create_index([("timestamp", -1)]),
+        db[SENTIMENT_COLLECTION].create_index([("netuid", 1), ("timestamp", -1)]),
+        db[SENTIMENT_COLLECTION].create_index([("timestamp", -1)]),
+    )
 
 
 # Database operations for Tao dividends
@@ -48,9 +123,6 @@ async def store_dividend_data(
     netuid: int, hotkey: str, dividend: int, timestamp: datetime = None
 ) -> str:
     """Store dividend data in the database."""
-    db = await get_db()
-    collection = db[DIVIDENDS_COLLECTION]
-
     if timestamp is None:
         timestamp = datetime.utcnow()
 
@@ -61,8 +133,7 @@ async def store_dividend_data(
         "timestamp": timestamp,
     }
 
-    result = await collection.insert_one(document)
-    return str(result.inserted_id)
+    return await _dividend_batcher.submit(document)
 
 
 async def get_dividend_history(
@@ -78,9 +149,11 @@ async def get_dividend_history(
     if hotkey is not None:
         query["hotkey"] = hotkey
 
-    cursor = collection.find(query).sort("timestamp", -1).limit(limit)
+    cursor = (
+        collection.find(query, DIVIDEND_PROJECTION).sort("timestamp", -1).limit(limit)
+    )
     results = await cursor.to_list(length=limit)
-    return results
+    return [_serialize_document(document) for document in results]
 
 
 # Stake history operations
@@ -126,9 +199,13 @@ async def get_stake_history(
     if action_type is not None:
         query["action_type"] = action_type
 
-    cursor = collection.find(query).sort("timestamp", -1).limit(limit)
+    cursor = (
+        collection.find(query, STAKE_ACTION_PROJECTION)
+        .sort("timestamp", -1)
+        .limit(limit)
+    )
     results = await cursor.to_list(length=limit)
-    return results
+    return [_serialize_document(document) for document in results]
 
 
 # Twitter sentiment operations
@@ -161,61 +238,62 @@ async def get_latest_sentiment(netuid: int) -> Optional[Dict[str, Any]]:
     db = await get_db()
     collection = db[SENTIMENT_COLLECTION]
 
-    result = await collection.find_one({"netuid": netuid}, sort=[("timestamp", -1)])
+    result = await collection.find_one(
+        {"netuid": netuid}, SENTIMENT_PROJECTION, sort=[("timestamp", -1)]
+    )
+
+    return _serialize_document(result) if result else None
 
-    return result
+
+def _latest_timestamp_pipeline(collection_name: str) -> List[Dict[str, Any]]:
+    """Aggregation stages yielding the latest timestamp of a collection."""
+    return [
+        {"$sort": {"timestamp": -1}},
+        {"$limit": 1},
+        {
+            "$project": {
+                "_id": 0,
+                "timestamp": 1,
+                "collection": {"$literal": collection_name},
+            }
+        },
+    ]
 
 
 async def get_database_stats() -> Dict[str, Any]:
     """Get statistics about database collections."""
     db = await get_db()
-
-    # Get collection counts
-    dividend_count = await db[DIVIDENDS_COLLECTION].count_documents({})
-    stake_count = await db[STAKE_HISTORY_COLLECTION].count_documents({})
-    sentiment_count = await db[SENTIMENT_COLLECTION].count_documents({})
-
-    # Get latest document from each collection
-    latest_dividend = None
-    latest_stake = None
-    latest_sentiment = None
-
-    dividend_cursor = db[DIVIDENDS_COLLECTION].find().sort("timestamp", -1).limit(1)
-    if await dividend_cursor.fetch_next:
-        latest_dividend = await dividend_cursor.next()
-
-    stake_cursor = db[STAKE_HISTORY_COLLECTION].find().sort("timestamp", -1).limit(1)
-    if await stake_cursor.fetch_next:
-        latest_stake = await stake_cursor.next()
-
-    sentiment_cursor = db[SENTIMENT_COLLECTION].find().sort("timestamp", -1).limit(1)
-    if await sentiment_cursor.fetch_next:
-        latest_sentiment = await sentiment_cursor.next()
+    collection_names = [
+        DIVIDENDS_COLLECTION,
+        STAKE_HISTORY_COLLECTION,
+        SENTIMENT_COLLECTION,
+    ]
+
+    # Latest timestamp of every collection in a single aggregation
+    latest_pipeline = _latest_timestamp_pipeline(DIVIDENDS_COLLECTION) + [
+        {"$unionWith": {"coll": name, "pipeline": _latest_timestamp_pipeline(name)}}
+        for name in collection_names[1:]
+    ]
+
+    # Get collection counts (from collection metadata rather than a scan) and
+    # the latest timestamps concurrently
+    *counts, latest_docs = await asyncio.gather(
+        *(db[name].estimated_document_count() for name in collection_names),
+        db[DIVIDENDS_COLLECTION].aggregate(latest_pipeline).to_list(None),
+    )
+    latest_timestamps = {doc["collection"]: doc.get("timestamp") for doc in latest_docs}
 
     # Format the response
     stats = {
         "collections": {
-            DIVIDENDS_COLLECTION: {
-                "count": dividend_count,
-                "latest_timestamp": (
-                    latest_dividend.get("timestamp") if latest_dividend else None
-                ),
-            },
-            STAKE_HISTORY_COLLECTION: {
-                "count": stake_count,
-                "latest_timestamp": (
-                    latest_stake.get("timestamp") if latest_stake else None
-                ),
-            },
-            SENTIMENT_COLLECTION: {
-                "count": sentiment_count,
-                "latest_timestamp": (
-                    latest_sentiment.get("timestamp") if latest_sentiment else None
-                ),
-            },
+            name: {
+                "count": count,
+                "latest_timestamp": latest_timestamps.get(name),
+            }
+            for name, count in zip(collection_names, counts)
         },
         "database_name": DB_NAME,
-        "total_documents": dividend_count + stake_count + sentiment_count,
+        "total_documents": sum(counts),
     }
 
     return stats
@@ -1,8 +1,72 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
-from app.api.routes import router
-from app.db import get_db_client, close_db_connection
+from app.api.routes import router, blockchain_service, cache_service
+from app.db import get_db_client, close_db_connection, ensure_indexes
+from app.db.mongo import MONGO_MIN_POOL_SIZE
+
+# Longest a Redis or blockchain warm-up may hold up startup; connections that
+# aren't ready by then are opened lazily by the first request that needs them.
+# MongoDB is already bounded by the client's server selection timeout.
+WARM_UP_TIMEOUT_SECONDS = 5
+
+
+# Startup and shutdown handlers
+async def startup_db_client():
+    """Initialize database connection on startup"""
+    # Created here first, so the API process keeps a pool of warm connections
+    client = await get_db_client(min_pool_size=MONGO_MIN_POOL_SIZE)
+    try:
+        # Open the connection pool now rather than on the first request
+        await client.admin.command("ping")
+        print("MongoDB connection established")
+    except Exception as e:
+        print(f"MongoDB is not reachable yet: {e}")
+    try:
+        await ensure_indexes()
+        print("MongoDB indexes ensured")
+    except Exception as e:
+        # Queries still work without the indexes, just more slowly
+        print(f"Failed to create MongoDB indexes: {e}")
+
+
+async def warm_up_redis_connection():
+    """Open a pooled Redis connection on startup"""
+    try:
+        await asyncio.wait_for(
+            cache_service.redis_client.ping(), WARM_UP_TIMEOUT_SECONDS
+        )
+        print("Redis connection established")
+    except Exception as e:
+        print(f"Redis is not reachable yet: {e!r}")
+
+
+async def warm_up_blockchain_connection():
+    """Connect to the blockchain on startup so the first request doesn't pay for it"""
+    try:
+        await asyncio.wait_for(blockchain_service.warm_up(), WARM_UP_TIMEOUT_SECONDS)
+        print("Blockchain connection established")
+    except Exception as e:
+        # Drop any half-open connection; queries will retry it lazily
+        print(f"Blockchain connection warm-up failed: {e!r}")
+        await blockchain_service.reset_subtensor()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up all external connections on startup and close them on shutdown"""
+    await asyncio.gather(
+        startup_db_client(),
+        warm_up_redis_connection(),
+        warm_up_blockchain_connection(),
+    )
+    yield
+    await close_db_connection()
+    print("MongoDB connection closed")
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -20,6 +84,8 @@ X-API-Key: your_api_key_here
 The API key should be set as the `API_KEY` environment variable on the server.
 """,
     version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Include API router
@@ -33,21 +99,6 @@ async def health_check():
     return {"status": "healthy"}
 
 
-# Database startup and shutdown event handlers
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database connection on startup"""
-    await get_db_client()
-    print("MongoDB connection established")
-
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection on shutdown"""
-    await close_db_connection()
-    print("MongoDB connection closed")
-
-
 if __name__ == "__main__":
     import uvicorn
 
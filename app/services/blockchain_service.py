@@ -1,13 +1,83 @@
 import logging
 import asyncio
-from typing import Optional, Dict, Any, List, Union
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union
 import bittensor
 from bittensor.core.async_subtensor import AsyncSubtensor
+from scalecodec.utils.ss58 import ss58_decode, ss58_encode
+from websockets.exceptions import ConnectionClosed
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Storage entries fetched per query_map page; large enough for a full subnet
+QUERY_MAP_PAGE_SIZE = 1000
+
+# Blockchain unit conversion: 1 TAO = 10^9 rao
+RAO_PER_TAO = 10**9
+
+# Errors meaning the websocket to the chain is gone and must be reopened
+CONNECTION_ERRORS = (OSError, ConnectionClosed)
+
+# How long single-hotkey dividend queries are collected before being sent
+HOTKEY_BATCH_WINDOW_SECONDS = 0.01
+
+# Batches with at least this many distinct hotkeys read the whole subnet with one
+# map query; smaller batches use a point query per hotkey
+HOTKEY_BATCH_MAP_THRESHOLD = 8
+
+# SS58 address format used by Bittensor accounts
+SS58_FORMAT = 42
+
+
+def _decode_hotkey(key: Any) -> str:
+    """Convert a storage map key into an SS58 hotkey address."""
+    key = getattr(key, "value", key)
+    if isinstance(key, str):
+        return key
+    # Account IDs are decoded as a (possibly wrapped) sequence of bytes
+    if isinstance(key, (tuple, list)) and len(key) == 1:
+        key = key[0]
+    return ss58_encode(bytes(key), ss58_format=SS58_FORMAT)
+
+
+def _normalize_hotkey(hotkey: str) -> str:
+    """
+    Validate an SS58 hotkey and re-encode it in the Bittensor address format, so
+    point queries and subnet map lookups agree on the key.
+
+    Raises:
+        ValueError: If the hotkey is not a valid SS58 address
+    """
+    return ss58_encode(ss58_decode(hotkey), ss58_format=SS58_FORMAT)
+
+
+@lru_cache(maxsize=1)
+def _load_wallet() -> bittensor.wallet:
+    """
+    Load the configured wallet once per process. Celery tasks create a new
+    BlockchainService per run, so caching per instance alone would regenerate
+    the coldkey from the mnemonic on every stake operation.
+    """
+    logger.info(
+        "Initializing Bittensor wallet: %s/%s",
+        settings.BITTENSOR_WALLET_NAME,
+        settings.BITTENSOR_WALLET_HOTKEY,
+    )
+    wallet = bittensor.wallet(
+        name=settings.BITTENSOR_WALLET_NAME,
+        hotkey=settings.BITTENSOR_WALLET_HOTKEY,
+    )
+
+    # Regenerate the wallet if mnemonic is provided
+    if settings.BITTENSOR_WALLET_MNEMONIC:
+        logger.info("Regenerating wallet using provided mnemonic")
+        wallet.regenerate_coldkeypub(mnemonic=settings.BITTENSOR_WALLET_MNEMONIC)
+
+    logger.info("Wallet initialized: %s", wallet.coldkeypub.ss58_address)
+    return wallet
+
 
 class BlockchainService:
     """Service for interacting with the Bittensor blockchain."""
@@ -16,6 +86,9 @@ class BlockchainService:
         """Initialize AsyncSubtensor connection."""
         self._subtensor = None
         self._wallet = None
+        # Hotkey dividend queries waiting to be sent, per netuid
+        self._pending_hotkeys: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+        self._flush_tasks: set = set()
 
     async def get_subtensor(self) -> AsyncSubtensor:
         """
@@ -24,7 +97,7 @@ class BlockchainService:
         """
         if self._subtensor is None:
             logger.info(
-                f"Initializing AsyncSubtensor for network: {settings.BITTENSOR_NETWORK}"
+                "Initializing AsyncSubtensor for network: %s", settings.BITTENSOR_NETWORK
             )
 
             try:
@@ -49,36 +122,46 @@ class BlockchainService:
                     )
 
                 logger.info(
-                    f"AsyncSubtensor initialized for {settings.BITTENSOR_NETWORK} network"
+                    "AsyncSubtensor initialized for %s network",
+                    settings.BITTENSOR_NETWORK,
                 )
             except Exception as e:
-                logger.error(f"Error initializing AsyncSubtensor: {str(e)}")
+                logger.error("Error initializing AsyncSubtensor: %s", e)
                 raise
 
         return self._subtensor
 
+    async def reset_subtensor(self) -> None:
+        """
+        Drop a broken AsyncSubtensor connection so the next query reconnects
+        instead of failing on the same dead websocket.
+        """
+        subtensor, self._subtensor = self._subtensor, None
+        if subtensor is None:
+            return
+        logger.warning("Resetting AsyncSubtensor connection after connection error")
+        try:
+            await subtensor.close()
+        except Exception as e:
+            logger.debug("Error closing AsyncSubtensor: %s", e)
+
+    async def reset_on_connection_error(self, error: Exception) -> None:
+        """Reset the connection if the error means the websocket is gone."""
+        if isinstance(error, CONNECTION_ERRORS):
+            await self.reset_subtensor()
+
+    async def warm_up(self) -> None:
+        """Open the blockchain connection ahead of the first query."""
+        subtensor = await self.get_subtensor()
+        await subtensor.initialize()
+
     def get_wallet(self) -> bittensor.wallet:
         """
         Get or initialize Bittensor wallet.
         Uses mnemonic from settings.
         """
         if self._wallet is None:
-            logger.info(
-                f"Initializing Bittensor wallet: {settings.BITTENSOR_WALLET_NAME}/{settings.BITTENSOR_WALLET_HOTKEY}"
-            )
-            self._wallet = bittensor.wallet(
-                name=settings.BITTENSOR_WALLET_NAME,
-                hotkey=settings.BITTENSOR_WALLET_HOTKEY,
-            )
-
-            # Regenerate the wallet if mnemonic is provided
-            if settings.BITTENSOR_WALLET_MNEMONIC:
-                logger.info("Regenerating wallet using provided mnemonic")
-                self._wallet.regenerate_coldkeypub(
-                    mnemonic=settings.BITTENSOR_WALLET_MNEMONIC
-                )
-
-            logger.info(f"Wallet initialized: {self._wallet.coldkeypub.ss58_address}")
+            self._wallet = _load_wallet()
         return self._wallet
 
     async def get_tao_dividends(
@@ -102,66 +185,28 @@ class BlockchainService:
 
         try:
             logger.info(
-                f"Querying TaoDividendsPerSubnet for netuid={actual_netuid}, hotkey={actual_hotkey}"
+                "Querying TaoDividendsPerSubnet for netuid=%s, hotkey=%s",
+                actual_netuid,
+                actual_hotkey,
             )
 
             if hotkey is None:
-                # If hotkey is not provided, get dividends for all hotkeys in the subnet
-                metagraph = await subtensor.metagraph(netuid=actual_netuid)
-
-                results = []
-                for uid, neuron_hotkey in enumerate(metagraph.hotkeys):
-                    try:
-                        # Use direct substrate interface to query TaoDividendsPerSubnet
-                        dividend_query_result = await subtensor.substrate.query_map(
-                            module="SubtensorModule",
-                            storage_function="TaoDividendsPerSubnet",
-                            params=[actual_netuid, neuron_hotkey],
-                        )
-                        # Log the raw result for debugging
-                        logger.debug(
-                            f"Raw query_map result for {neuron_hotkey}: {dividend_query_result!r}"
-                        )  # Added logging
-
-                        dividend_value = 0.0
-                        # Refined extraction logic with better checks
-                        if (
-                            dividend_query_result
-                            and isinstance(dividend_query_result, list)
-                            and len(dividend_query_result) > 0
-                        ):
-                            # Assuming the structure is like [(key_info, value_object)]
-                            value_object = dividend_query_result[0][
-                                1
-                            ]  # Check index 1 for value
-                            if value_object and hasattr(value_object, "value"):
-                                # Convert to float, handle potential None value explicitly
-                                raw_value = value_object.value
-                                # Check if raw_value is not None before converting to float
-                                dividend_value = (
-                                    float(raw_value) if raw_value is not None else 0.0
-                                )
-                            else:
-                                logger.warning(
-                                    f"Value object for {neuron_hotkey} has unexpected structure or no 'value' attribute: {value_object!r}"
-                                )
-                        elif dividend_query_result:
-                            logger.warning(
-                                f"query_map result for {neuron_hotkey} has unexpected structure: {dividend_query_result!r}"
-                            )
-
-                        # Simplified response item, removing uid
-                        results.append(
-                            {
-                                "netuid": actual_netuid,
-                                "hotkey": neuron_hotkey,
-                                "dividend": dividend_value,  # Use the extracted value
-                            }
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            f"Error fetching dividend for {neuron_hotkey}: {str(e)}"
-                        )
+                # If hotkey is not provided, read every (hotkey, dividend) entry
+                # stored for the subnet. Hotkeys without a stored dividend are
+                # not included.
+                subnet_dividends = await self._query_subnet_dividends(
+                    subtensor, actual_netuid
+                )
+
+                # Simplified response items, removing uid
+                results = [
+                    {
+                        "netuid": actual_netuid,
+                        "hotkey": neuron_hotkey,
+                        "dividend": dividend_value,
+                    }
+                    for neuron_hotkey, dividend_value in subnet_dividends.items()
+                ]
 
                 # Simplified response structure for multiple hotkeys
                 return {
@@ -169,28 +214,11 @@ class BlockchainService:
                     "dividends": results,
                 }
             else:
-                # Query dividend for specific hotkey
-                dividend_query_result = await subtensor.substrate.query(
-                    module="SubtensorModule",
-                    storage_function="TaoDividendsPerSubnet",
-                    params=[actual_netuid, actual_hotkey],
+                # Query dividend for specific hotkey, batched with concurrent
+                # queries for other hotkeys on the same subnet
+                dividend_value = await self._batched_hotkey_dividend(
+                    subtensor, actual_netuid, actual_hotkey
                 )
-                # Log the raw result for debugging
-                logger.debug(
-                    f"Raw query result for {actual_hotkey}: {dividend_query_result!r}"
-                )  # Added logging
-
-                dividend_value = 0.0
-                # Refined extraction logic
-                if dividend_query_result and hasattr(dividend_query_result, "value"):
-                    # Convert to float, handle potential None value explicitly
-                    raw_value = dividend_query_result.value
-                    # Check if raw_value is not None before converting to float
-                    dividend_value = float(raw_value) if raw_value is not None else 0.0
-                elif dividend_query_result:
-                    logger.warning(
-                        f"Query result for {actual_hotkey} has no 'value' attribute: {dividend_query_result!r}"
-                    )
 
                 # Response for single hotkey matches core fields of README example
                 return {
@@ -200,11 +228,157 @@ class BlockchainService:
                 }
 
         except Exception as e:
-            logger.error(f"Error querying blockchain: {str(e)}", exc_info=True)
+            logger.error("Error querying blockchain: %s", e, exc_info=True)
+            await self.reset_on_connection_error(e)
             raise
 
+    async def _batched_hotkey_dividend(
+        self, subtensor: AsyncSubtensor, netuid: int, hotkey: str
+    ) -> int:
+        """
+        Get the dividend for a single hotkey, collecting concurrent queries for
+        the same subnet over a short window so they share one blockchain query.
+
+        Args:
+            subtensor: Connected AsyncSubtensor instance
+            netuid: Subnet ID
+            hotkey: Account hotkey
+
+        Returns:
+            Dividend value, or 0 if none is stored
+
+        Raises:
+            ValueError: If the hotkey is not a valid SS58 address
+        """
+        hotkey = _normalize_hotkey(hotkey)
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending_hotkeys.get(netuid)
+        if batch is None:
+            batch = self._pending_hotkeys[netuid] = []
+            flush_task = asyncio.create_task(
+                self._flush_hotkey_batch(subtensor, netuid)
+            )
+            # Keep a reference so the task isn't garbage collected mid-flight
+            self._flush_tasks.add(flush_task)
+            flush_task.add_done_callback(self._flush_tasks.discard)
+        batch.append((hotkey, future))
+        return await future
+
+    async def _flush_hotkey_batch(self, subtensor: AsyncSubtensor, netuid: int):
+        """
+        Resolve every hotkey query collected for a subnet. Small batches use
+        concurrent point queries; larger ones share one map query over the whole
+        subnet.
+        """
+        await asyncio.sleep(HOTKEY_BATCH_WINDOW_SECONDS)
+        batch = self._pending_hotkeys.pop(netuid)
+        hotkeys = list({hotkey for hotkey, _ in batch})
+
+        if len(hotkeys) < HOTKEY_BATCH_MAP_THRESHOLD:
+            # Each hotkey gets the outcome of its own query, so one failing
+            # query doesn't fail requests for the other hotkeys
+            outcomes = await asyncio.gather(
+                *(
+                    self._query_hotkey_dividend(subtensor, netuid, hotkey)
+                    for hotkey in hotkeys
+                ),
+                return_exceptions=True,
+            )
+        else:
+            logger.info(
+                "Batching dividend queries for %d hotkeys on netuid=%s",
+                len(hotkeys),
+                netuid,
+            )
+            try:
+                dividends = await self._query_subnet_dividends(subtensor, netuid)
+            except Exception as e:
+                # The map query is shared, so its failure fails the whole batch
+                outcomes = [e] * len(hotkeys)
+            else:
+                outcomes = [dividends.get(hotkey, 0) for hotkey in hotkeys]
+
+        results = dict(zip(hotkeys, outcomes))
+        for hotkey, future in batch:
+            if future.done():
+                continue
+            outcome = results[hotkey]
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    @staticmethod
+    async def _query_subnet_dividends(
+        subtensor: AsyncSubtensor, netuid: int
+    ) -> Dict[str, int]:
+        """
+        Read every TaoDividendsPerSubnet entry for a subnet with a single map
+        query over the netuid prefix.
+
+        Args:
+            subtensor: Connected AsyncSubtensor instance
+            netuid: Subnet ID
+
+        Returns:
+            Dividend value per hotkey that has one stored
+        """
+        dividend_entries = await subtensor.substrate.query_map(
+            module="SubtensorModule",
+            storage_function="TaoDividendsPerSubnet",
+            params=[netuid],
+            page_size=QUERY_MAP_PAGE_SIZE,
+        )
+
+        dividends = {}
+        async for key, value_object in dividend_entries:
+            raw_value = getattr(value_object, "value", value_object)
+            dividends[_decode_hotkey(key)] = (
+                int(raw_value) if raw_value is not None else 0
+            )
+        return dividends
+
+    @staticmethod
+    async def _query_hotkey_dividend(
+        subtensor: AsyncSubtensor, netuid: int, hotkey: str
+    ) -> int:
+        """
+        Query TaoDividendsPerSubnet for a single hotkey.
+
+        Args:
+            subtensor: Connected AsyncSubtensor instance
+            netuid: Subnet ID
+            hotkey: Account hotkey
+
+        Returns:
+            Dividend value, or 0 if none is stored
+        """
+        dividend_query_result = await subtensor.substrate.query(
+            module="SubtensorModule",
+            storage_function="TaoDividendsPerSubnet",
+            params=[netuid, hotkey],
+        )
+        # Log the raw result for debugging
+        logger.debug("Raw query result for %s: %r", hotkey, dividend_query_result)
+
+        dividend_value = 0
+        # Refined extraction logic
+        if dividend_query_result and hasattr(dividend_query_result, "value"):
+            # Keep the on-chain integer (rao) to avoid float precision loss
+            raw_value = dividend_query_result.value
+            # Check if raw_value is not None before converting
+            dividend_value = int(raw_value) if raw_value is not None else 0
+        elif dividend_query_result:
+            logger.warning(
+                "Query result for %s has no 'value' attribute: %r",
+                hotkey,
+                dividend_query_result,
+            )
+
+        return dividend_value
+
     async def add_stake(
-        self, netuid: int, hotkey: str, amount: float
+        self, netuid: int, hotkey: str, amount_rao: int
     ) -> Dict[str, Any]:
         """
         Add stake to a hotkey on a subnet.
@@ -212,7 +386,7 @@ class BlockchainService:
         Args:
             netuid: Subnet ID
             hotkey: Account hotkey
-            amount: Amount of TAO to stake
+            amount_rao: Amount to stake, in rao
 
         Returns:
             Transaction result
@@ -221,10 +395,9 @@ class BlockchainService:
         wallet = self.get_wallet()
 
         try:
-            logger.info(f"Adding stake: {amount} TAO to {hotkey} on subnet {netuid}")
-
-            # Convert amount to rao (blockchain unit) - 1 TAO = 10^9 rao
-            amount_rao = int(amount * 1e9)
+            logger.info(
+                "Adding stake: %s rao to %s on subnet %s", amount_rao, hotkey, netuid
+            )
 
             # Use AsyncSubtensor's add_stake method as specified in the requirements
             response = await subtensor.add_stake(
@@ -238,29 +411,34 @@ class BlockchainService:
                 "operation": "add_stake",
                 "netuid": netuid,
                 "hotkey": hotkey,
-                "amount": amount,
+                "amount": amount_rao / RAO_PER_TAO,
+                "amount_rao": amount_rao,
                 "hash": str(response.hash) if response else None,
             }
 
         except Exception as e:
-            logger.error(f"Error adding stake: {str(e)}", exc_info=True)
+            logger.error("Error adding stake: %s", e, exc_info=True)
+            await self.reset_on_connection_error(e)
             return {
                 "success": False,
                 "operation": "add_stake",
                 "netuid": netuid,
                 "hotkey": hotkey,
-                "amount": amount,
+                "amount": amount_rao / RAO_PER_TAO,
+                "amount_rao": amount_rao,
                 "error": str(e),
             }
 
-    async def unstake(self, netuid: int, hotkey: str, amount: float) -> Dict[str, Any]:
+    async def unstake(
+        self, netuid: int, hotkey: str, amount_rao: int
+    ) -> Dict[str, Any]:
         """
         Unstake from a hotkey on a subnet.
 
         Args:
             netuid: Subnet ID
             hotkey: Account hotkey
-            amount: Amount of TAO to unstake
+            amount_rao: Amount to unstake, in rao
 
         Returns:
             Transaction result
@@ -269,10 +447,9 @@ class BlockchainService:
         wallet = self.get_wallet()
 
         try:
-            logger.info(f"Unstaking: {amount} TAO from {hotkey} on subnet {netuid}")
-
-            # Convert amount to rao (blockchain unit) - 1 TAO = 10^9 rao
-            amount_rao = int(amount * 1e9)
+            logger.info(
+                "Unstaking: %s rao from %s on subnet %s", amount_rao, hotkey, netuid
+            )
 
             # Use AsyncSubtensor's unstake method as specified in the requirements
             response = await subtensor.unstake(
@@ -286,17 +463,20 @@ class BlockchainService:
                 "operation": "unstake",
                 "netuid": netuid,
                 "hotkey": hotkey,
-                "amount": amount,
+                "amount": amount_rao / RAO_PER_TAO,
+                "amount_rao": amount_rao,
                 "hash": str(response.hash) if response else None,
             }
 
         except Exception as e:
-            logger.error(f"Error unstaking: {str(e)}", exc_info=True)
+            logger.error("Error unstaking: %s", e, exc_info=True)
+            await self.reset_on_connection_error(e)
             return {
                 "success": False,
                 "operation": "unstake",
                 "netuid": netuid,
                 "hotkey": hotkey,
-                "amount": amount,
+                "amount": amount_rao / RAO_PER_TAO,
+                "amount_rao": amount_rao,
                 "error": str(e),
             }
@@ -1,18 +1,35 @@
-import json
-import redis
-from typing import Any, Dict, Optional
+import asyncio
+import time
+import orjson
+import redis.asyncio as redis
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from app.core.config import settings
 
+# Connection pool shared by every RedisCacheService instance in the process.
+# Requests wait for a free connection instead of failing when it is exhausted.
+_connection_pool = redis.BlockingConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=5,
+)
+
+# Values stored in place of dividend data while a query is in flight or after
+# it failed, so other workers don't repeat the same blockchain query
+PENDING_SENTINEL = b"__pending__"
+ERROR_SENTINEL = b"__error__"
+
+# Maximum number of keys passed to a single UNLINK when purging the cache
+PURGE_BATCH_SIZE = 500
+
 
 class RedisCacheService:
     """Service to handle Redis caching operations."""
 
     def __init__(self):
-        """Initialize Redis connection."""
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True
-        )
+        """Initialize Redis client backed by the shared connection pool."""
+        self.redis_client = redis.Redis(connection_pool=_connection_pool)
 
     def get_cache_key(self, netuid: Optional[int], hotkey: Optional[str]) -> str:
         """Generate a cache key for dividend data."""
@@ -20,38 +37,134 @@ class RedisCacheService:
         hotkey_part = f"hotkey:{hotkey}" if hotkey is not None else "hotkey:all"
         return f"tao_dividend:{netuid_part}:{hotkey_part}"
 
-    def get_cached_data(
-        self, netuid: Optional[int], hotkey: Optional[str]
-    ) -> Optional[Dict[str, Any]]:
+    async def get_cached_payload(self, cache_key: str) -> Optional[bytes]:
         """
-        Try to get dividend data from cache.
-        Returns cached data or None if not found.
+        Try to get the serialized dividend data for a cache key.
+        Returns the raw JSON bytes or None if not found.
         """
-        cache_key = self.get_cache_key(netuid, hotkey)
-        cached_data = self.redis_client.get(cache_key)
+        return await self.redis_client.get(cache_key)
 
-        if cached_data:
-            return json.loads(cached_data)
-        return None
-
-    def cache_data(
-        self, netuid: Optional[int], hotkey: Optional[str], data: Dict[str, Any]
-    ) -> bool:
+    async def cache_data(self, cache_key: str, data: Dict[str, Any]) -> bool:
         """
         Cache dividend data in Redis with TTL.
         Returns True if successful, False otherwise.
         """
         try:
-            cache_key = self.get_cache_key(netuid, hotkey)
             # Set with expiration (TTL)
-            self.redis_client.setex(
-                cache_key, settings.CACHE_TTL_SECONDS, json.dumps(data)
+            await self.redis_client.setex(
+                cache_key, settings.CACHE_TTL_SECONDS, orjson.dumps(data)
+            )
+            return True
+        except Exception:
+            return False
+
+    def get_sentiment_cache_key(self, netuid: int) -> str:
+        """Generate a cache key for subnet sentiment results."""
+        return f"sentiment:netuid:{netuid}"
+
+    async def get_cached_sentiment(self, netuid: int) -> Optional[Dict[str, Any]]:
+        """
+        Try to get a recent sentiment analysis result for a subnet.
+        Returns cached data or None if not found or Redis is unavailable.
+        """
+        try:
+            cached_data = await self.redis_client.get(
+                self.get_sentiment_cache_key(netuid)
+            )
+        except Exception:
+            return None
+        return orjson.loads(cached_data) if cached_data else None
+
+    async def cache_sentiment(self, netuid: int, data: Dict[str, Any]) -> bool:
+        """
+        Cache a sentiment analysis result for a subnet with TTL.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            await self.redis_client.setex(
+                self.get_sentiment_cache_key(netuid),
+                settings.SENTIMENT_CACHE_TTL_SECONDS,
+                orjson.dumps(data),
             )
             return True
         except Exception:
             return False
 
-    def purge_cache(
+    async def get_or_fetch(
+        self, cache_key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return the cached result of a read-only query, or run it and cache it.
+
+        Results are serialized with orjson so that datetimes from MongoDB are
+        cached as ISO 8601 strings, matching how they are returned as JSON.
+        Redis errors fall back to running the query directly.
+        """
+        try:
+            cached_data = await self.redis_client.get(cache_key)
+            if cached_data is not None:
+                return orjson.loads(cached_data)
+        except Exception:
+            return await fetch()
+
+        result = await fetch()
+        try:
+            await self.redis_client.setex(
+                cache_key, settings.CACHE_TTL_SECONDS, orjson.dumps(result)
+            )
+        except Exception:
+            pass
+        return result
+
+    async def get_or_mark_pending(self, cache_key: str) -> Optional[bytes]:
+        """
+        Get the cached value for a key, or mark it as in flight if it is empty.
+
+        The lookup and the marker are sent in a single MULTI/EXEC round trip.
+        Returns the cached value, or None if the key was empty and is now marked
+        as pending by this caller.
+        """
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(
+                cache_key,
+                PENDING_SENTINEL,
+                ex=settings.CACHE_PENDING_TTL_SECONDS,
+                nx=True,
+            )
+            pipe.get(cache_key)
+            marked, cached_data = await pipe.execute()
+
+        return None if marked else cached_data
+
+    async def mark_failed(self, cache_key: str) -> bool:
+        """
+        Mark a dividend query as recently failed so it isn't retried immediately.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            await self.redis_client.setex(
+                cache_key, settings.CACHE_ERROR_TTL_SECONDS, ERROR_SENTINEL
+            )
+            return True
+        except Exception:
+            return False
+
+    async def wait_for_pending(
+        self, cache_key: str, poll_interval: float = 0.1
+    ) -> Optional[bytes]:
+        """
+        Wait for an in-flight query on another worker to replace its pending marker.
+        Returns the new cached value, or None if the marker expired without one.
+        """
+        deadline = time.monotonic() + settings.CACHE_PENDING_TTL_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            cached_data = await self.get_cached_payload(cache_key)
+            if cached_data != PENDING_SENTINEL:
+                return cached_data
+        return None
+
+    async def purge_cache(
         self, netuid: Optional[int] = None, hotkey: Optional[str] = None
     ) -> bool:
         """
@@ -60,14 +173,22 @@ class RedisCacheService:
         """
         try:
             if netuid is None and hotkey is None:
-                # Delete all tao_dividend keys
-                keys = self.redis_client.keys("tao_dividend:*")
-                if keys:
-                    self.redis_client.delete(*keys)
+                # Delete all tao_dividend keys. SCAN avoids blocking the server
+                # the way KEYS does, and UNLINK frees memory in the background.
+                batch = []
+                async for key in self.redis_client.scan_iter(
+                    match="tao_dividend:*", count=1000
+                ):
+                    batch.append(key)
+                    if len(batch) >= PURGE_BATCH_SIZE:
+                        await self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    await self.redis_client.unlink(*batch)
             else:
                 # Delete specific key
                 cache_key = self.get_cache_key(netuid, hotkey)
-                self.redis_client.delete(cache_key)
+                await self.redis_client.unlink(cache_key)
             return True
         except Exception:
             return False
@@ -1,12 +1,17 @@
+import asyncio
 import logging
 import json
 import httpx
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import aiohttp
 from app.core.config import settings
+from app.services.cache_service import RedisCacheService
 
 logger = logging.getLogger(__name__)
 
+# Character budget for tweet text in the LLM prompt (reasonable token limit for most LLMs)
+MAX_PROMPT_TWEET_CHARS = 8000
+
 
 class SentimentService:
     """Service for sentiment analysis of Twitter data using Datura.ai and Chutes.ai."""
@@ -15,6 +20,26 @@ class SentimentService:
         """Initialize API keys for external services."""
         self.datura_api_key = settings.DATURA_API_KEY
         self.chutes_api_key = settings.CHUTES_API_KEY
+        self.cache_service = RedisCacheService()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get or create the HTTP session shared by all requests of this service.
+        Reusing it keeps connections to Datura and Chutes alive between calls.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def search_tweets(self, netuid: int) -> List[Dict[str, Any]]:
         """
@@ -43,26 +68,26 @@ class SentimentService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(
-                            f"Datura API error: {response.status}, {await response.text()}"
-                        )
-                        raise Exception(
-                            f"Datura API returned status code {response.status}"
-                        )
-
-                    data = await response.json()
-
-                    if not data.get("data") or not isinstance(data["data"], list):
-                        logger.warning(f"Datura API returned no tweets: {data}")
-                        return []
-
-                    logger.info(
-                        f"Found {len(data['data'])} tweets about Bittensor netuid {netuid}"
+            session = await self.get_session()
+            async with session.post(url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    logger.error(
+                        f"Datura API error: {response.status}, {await response.text()}"
                     )
-                    return data["data"]
+                    raise Exception(
+                        f"Datura API returned status code {response.status}"
+                    )
+
+                data = await response.json()
+
+                if not data.get("data") or not isinstance(data["data"], list):
+                    logger.warning(f"Datura API returned no tweets: {data}")
+                    return []
+
+                logger.info(
+                    f"Found {len(data['data'])} tweets about Bittensor netuid {netuid}"
+                )
+                return data["data"]
 
         except Exception as e:
             logger.error(f"Error searching tweets: {str(e)}", exc_info=True)
@@ -93,10 +118,23 @@ class SentimentService:
             )
             return 0.0
 
-        # Join tweets for context but limit text length to avoid token limits
-        combined_text = "\n".join(tweet_texts)
-        if len(combined_text) > 8000:  # Reasonable token limit for most LLMs
-            combined_text = combined_text[:8000] + "..."
+        # Join tweets for context but limit text length to avoid token limits.
+        # Tweets arrive sorted by relevancy, so pack whole tweets in order rather
+        # than cutting the last one off mid-sentence.
+        selected_texts = []
+        combined_length = 0
+        for text in tweet_texts:
+            combined_length += len(text) + 1  # Include the joining newline
+            if combined_length > MAX_PROMPT_TWEET_CHARS:
+                break
+            selected_texts.append(text)
+        if not selected_texts:
+            selected_texts = [tweet_texts[0][:MAX_PROMPT_TWEET_CHARS]]
+        if len(selected_texts) < len(tweet_texts):
+            logger.info(
+                f"Analyzing {len(selected_texts)} of {len(tweet_texts)} tweets to fit the prompt budget"
+            )
+        combined_text = "\n".join(selected_texts)
 
         # Define the prompt for the LLM
         prompt = f"""
@@ -128,74 +166,88 @@ class SentimentService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(
-                            f"Chutes API error: {response.status}, {await response.text()}"
-                        )
-                        raise Exception(
-                            f"Chutes API returned status code {response.status}"
-                        )
-
-                    data = await response.json()
-
-                    # Extract sentiment score from LLM response
-                    llm_output = data.get("output", "0").strip()
-
-                    # Try to parse the sentiment score
-                    try:
-                        # Extract just the number from the response
-                        sentiment_score = float(llm_output.replace(",", "").strip())
-                        # Ensure the score is within the valid range
-                        sentiment_score = max(min(sentiment_score, 100), -100)
-                        logger.info(f"Sentiment analysis result: {sentiment_score}")
-                        return sentiment_score
-                    except (ValueError, TypeError):
-                        logger.warning(
-                            f"Could not parse sentiment score from LLM output: {llm_output}"
-                        )
-                        return 0.0  # Default to neutral sentiment
+            session = await self.get_session()
+            async with session.post(url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    logger.error(
+                        f"Chutes API error: {response.status}, {await response.text()}"
+                    )
+                    raise Exception(
+                        f"Chutes API returned status code {response.status}"
+                    )
+
+                data = await response.json()
+
+                # Extract sentiment score from LLM response
+                llm_output = data.get("output", "0").strip()
+
+                # Try to parse the sentiment score
+                try:
+                    # Extract just the number from the response
+                    sentiment_score = float(llm_output.replace(",", "").strip())
+                    # Ensure the score is within the valid range
+                    sentiment_score = max(min(sentiment_score, 100), -100)
+                    logger.info(f"Sentiment analysis result: {sentiment_score}")
+                    return sentiment_score
+                except (ValueError, TypeError):
+                    logger.warning(
+                        f"Could not parse sentiment score from LLM output: {llm_output}"
+                    )
+                    return 0.0  # Default to neutral sentiment
 
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}", exc_info=True)
             raise
 
-    async def analyze_sentiment_for_subnet(self, netuid: int) -> Dict[str, Any]:
+    async def analyze_sentiment_for_subnet(
+        self, netuid: int, force_refresh: bool = False
+    ) -> Dict[str, Any]:
         """
         Complete sentiment analysis workflow for a subnet.
         1. Search for tweets about the subnet
         2. Analyze sentiment of the tweets
 
+        Successful results are cached for SENTIMENT_CACHE_TTL_SECONDS and reused.
+
         Args:
             netuid: Subnet ID to analyze
+            force_refresh: Skip the cache and always run the analysis
 
         Returns:
             Dictionary with sentiment analysis results
         """
+        if not force_refresh:
+            cached_result = await self.cache_service.get_cached_sentiment(netuid)
+            if cached_result is not None:
+                logger.info(f"Using cached sentiment for netuid {netuid}")
+                return cached_result
+
         try:
             # Search for tweets
             tweets = await self.search_tweets(netuid)
 
             # If no tweets found, return neutral sentiment
             if not tweets:
-                return {
+                result = {
                     "success": True,
                     "netuid": netuid,
                     "sentiment_score": 0.0,
                     "num_tweets_analyzed": 0,
                     "message": "No tweets found for analysis",
                 }
+            else:
+                # Analyze sentiment
+                sentiment_score = await self.analyze_sentiment_with_llm(tweets)
 
-            # Analyze sentiment
-            sentiment_score = await self.analyze_sentiment_with_llm(tweets)
+                result = {
+                    "success": True,
+                    "netuid": netuid,
+                    "sentiment_score": sentiment_score,
+                    "num_tweets_analyzed": len(tweets),
+                }
 
-            return {
-                "success": True,
-                "netuid": netuid,
-                "sentiment_score": sentiment_score,
-                "num_tweets_analyzed": len(tweets),
-            }
+            await self.cache_service.cache_sentiment(netuid, result)
+            return result
 
         except Exception as e:
             logger.error(
@@ -206,3 +258,26 @@ class SentimentService:
                 "netuid": netuid,
                 "error": str(e),
             }
+
+    async def analyze_sentiments_for_subnets(
+        self, netuids: List[int], max_concurrency: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the sentiment analysis workflow for several subnets concurrently.
+
+        Args:
+            netuids: Subnet IDs to analyze
+            max_concurrency: Maximum number of subnets analyzed at once
+
+        Returns:
+            Sentiment analysis results, in the same order as netuids
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def analyze(netuid: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_sentiment_for_subnet(netuid)
+
+        # analyze_sentiment_for_subnet reports errors in its result, so one
+        # failing subnet doesn't affect the others
+        return await asyncio.gather(*(analyze(netuid) for netuid in netuids))
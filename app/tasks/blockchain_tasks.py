@@ -1,14 +1,96 @@
 from typing import Dict, Any, Optional
-import logging
 import asyncio
+import logging
 from celery.exceptions import SoftTimeLimitExceeded  # type: ignore
-from app.worker import celery_app
+from celery.signals import worker_process_init
+from app.worker import celery_app, run_async
 from app.core.config import settings
-from app.services.blockchain_service import BlockchainService
+from app.services.blockchain_service import BlockchainService, RAO_PER_TAO
 from app.db import record_stake_action  # Import the database function
 
 logger = logging.getLogger(__name__)
 
+# Stake 0.01 TAO per sentiment point, computed in integer rao to avoid float rounding
+RAO_PER_SENTIMENT_POINT = RAO_PER_TAO // 100
+# Minimum amount worth staking, to avoid dust transactions (0.001 TAO)
+MIN_STAKE_RAO = RAO_PER_TAO // 1000
+
+# Fixed part of the result returned when the stake amount is too small to act on
+_ZERO_AMOUNT_RESULT = {
+    "success": True,
+    "operation": "none",
+    "message": "Sentiment score resulted in zero or negligible stake amount",
+    "amount": 0,
+}
+
+# Kept well under Celery's worker_proc_alive_timeout (4s), which kills child
+# processes that take longer than that to initialize
+WARM_UP_TIMEOUT_SECONDS = 2
+
+# Shared across tasks so the AsyncSubtensor connection, which is bound to the
+# worker's event loop, is reused instead of reconnecting for every task
+blockchain_service = BlockchainService()
+
+
+@worker_process_init.connect
+def warm_up_blockchain_connection(**kwargs):
+    """Connect to the blockchain when the worker process starts."""
+    try:
+        run_async(
+            asyncio.wait_for(blockchain_service.warm_up(), WARM_UP_TIMEOUT_SECONDS)
+        )
+    except Exception as e:
+        # Drop any half-open connection; the first task will reconnect
+        logger.warning("Blockchain connection warm-up failed: %r", e)
+        run_async(blockchain_service.reset_subtensor())
+
+
+async def stake_and_record(
+    operation: str, netuid: int, hotkey: str, amount_rao: int, sentiment_score: float
+) -> Dict[str, Any]:
+    """
+    Perform a stake/unstake operation and record it in the database if successful.
+
+    Args:
+        operation: "add_stake" or "unstake"
+        netuid: The subnet ID to stake/unstake on
+        hotkey: The hotkey to stake/unstake to
+        amount_rao: Amount to stake/unstake, in rao
+        sentiment_score: Sentiment score the operation is based on
+    """
+    if operation == "add_stake":
+        result = await blockchain_service.add_stake(netuid, hotkey, amount_rao)
+    else:
+        result = await blockchain_service.unstake(netuid, hotkey, amount_rao)
+
+    # Add sentiment information to the result
+    result["sentiment_score"] = sentiment_score
+
+    # Record the stake action in the database if blockchain operation was successful
+    if not result.get("success", False):
+        result["stored_in_db"] = False
+        return result
+
+    try:
+        db_result = await record_stake_action(
+            netuid=netuid,
+            hotkey=hotkey,
+            action_type=operation,  # "add_stake" or "unstake"
+            amount=amount_rao / RAO_PER_TAO,
+            sentiment_score=sentiment_score,
+        )
+
+        # Add database storage status to result
+        result["stored_in_db"] = True
+        result["db_record_id"] = db_result
+        logger.info("Stake action recorded in database with ID: %s", db_result)
+    except Exception as db_error:
+        logger.error("Failed to store stake action in database: %s", db_error)
+        result["stored_in_db"] = False
+        result["db_error"] = str(db_error)
+
+    return result
+
 
 @celery_app.task(name="process_stake_based_on_sentiment")
 def process_stake_based_on_sentiment_task(
@@ -22,12 +104,35 @@ def process_stake_based_on_sentiment_task(
         netuid: The subnet ID to stake/unstake on (optional)
         hotkey: The hotkey to stake/unstake to (optional)
     """
-    sentiment_score = 0  # Initialize outside try block for exception handling
+    return process_stake_based_on_sentiment(sentiment_result, netuid, hotkey)
+
+
+def process_stake_based_on_sentiment(
+    sentiment_result: Dict[str, Any], netuid: int = None, hotkey: str = None
+) -> Dict[str, Any]:
+    """
+    Stake or unstake based on a sentiment result and record the action.
+    Must be called from within a Celery task.
+
+    Args:
+        sentiment_result: The result from sentiment analysis task
+        netuid: The subnet ID to stake/unstake on (optional)
+        hotkey: The hotkey to stake/unstake to (optional)
+    """
+    # Extract sentiment score from the sentiment analysis result and work out the
+    # operation once, up front, so the timeout handler reports the same values
+    sentiment_score = sentiment_result.get("sentiment_score", 0.0)
+    # Calculate amount based on sentiment (0.01 tao * sentiment)
+    amount_rao = abs(round(sentiment_score * RAO_PER_SENTIMENT_POINT))
+    # For positive sentiment: stake, for negative: unstake
+    operation = "add_stake" if sentiment_score > 0 else "unstake"
+
     try:
-        # Extract sentiment score from the sentiment analysis result
+        # Nothing to stake if the sentiment analysis failed
         if not sentiment_result.get("success", False):
             logger.error(
-                f"Sentiment analysis failed: {sentiment_result.get('error', 'Unknown error')}"
+                "Sentiment analysis failed: %s",
+                sentiment_result.get("error", "Unknown error"),
             )
             return {
                 "success": False,
@@ -38,112 +143,57 @@ def process_stake_based_on_sentiment_task(
                 "sentiment_result": sentiment_result,
             }
 
-        sentiment_score = sentiment_result.get("sentiment_score", 0.0)
-        logger.info(f"Processing stake based on sentiment score: {sentiment_score}")
+        logger.info("Processing stake based on sentiment score: %s", sentiment_score)
 
         # Use default values if not provided
         netuid = netuid if netuid is not None else settings.DEFAULT_NETUID
         hotkey = hotkey if hotkey is not None else settings.DEFAULT_HOTKEY
 
-        # Calculate amount based on sentiment (0.01 tao * sentiment)
-        amount = abs(sentiment_score) * 0.01
-
         # Early exit for zero amount
-        if amount <= 0.001:  # Minimum threshold to avoid dust transactions
+        if amount_rao <= MIN_STAKE_RAO:  # Minimum threshold to avoid dust transactions
             return {
-                "success": True,
-                "operation": "none",
-                "message": "Sentiment score resulted in zero or negligible stake amount",
+                **_ZERO_AMOUNT_RESULT,
                 "netuid": netuid,
                 "hotkey": hotkey,
                 "sentiment_score": sentiment_score,
-                "amount": 0,
             }
 
-        # For positive sentiment: stake, for negative: unstake
-        operation = "add_stake" if sentiment_score > 0 else "unstake"
-
-        # Initialize blockchain service
-        blockchain_service = BlockchainService()
-
-        # Create new event loop for asyncio.run
-        asyncio.set_event_loop(asyncio.new_event_loop())
-
-        # Run the operation in the asyncio event loop
-        if operation == "add_stake":
-            result = asyncio.run(blockchain_service.add_stake(netuid, hotkey, amount))
-        else:
-            result = asyncio.run(blockchain_service.unstake(netuid, hotkey, amount))
-
-        # Add sentiment information to the result
-        result["sentiment_score"] = sentiment_score
-
-        # Record the stake action in the database if blockchain operation was successful
-        if result.get("success", False):
-            try:
-                # Create a new event loop for the database operation
-                db_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(db_loop)
-
-                # Store the stake action
-                db_result = db_loop.run_until_complete(
-                    record_stake_action(
-                        netuid=netuid,
-                        hotkey=hotkey,
-                        action_type=operation,  # "add_stake" or "unstake"
-                        amount=amount,
-                        sentiment_score=sentiment_score,
-                    )
-                )
-
-                # Close the loop
-                db_loop.close()
-
-                # Add database storage status to result
-                result["stored_in_db"] = True
-                result["db_record_id"] = db_result
-                logger.info(f"Stake action recorded in database with ID: {db_result}")
-            except Exception as db_error:
-                logger.error(
-                    f"Failed to store stake action in database: {str(db_error)}"
-                )
-                result["stored_in_db"] = False
-                result["db_error"] = str(db_error)
-        else:
-            result["stored_in_db"] = False
-
-        logger.info(f"Completed blockchain {operation} operation: {result['success']}")
+        # Run the operation and record it in a single pass on the worker's event loop
+        result = run_async(
+            stake_and_record(operation, netuid, hotkey, amount_rao, sentiment_score)
+        )
+
+        logger.info(
+            "Completed blockchain %s operation: %s", operation, result["success"]
+        )
 
         return result
 
     except SoftTimeLimitExceeded:
         # Handle soft time limit exceeded gracefully
         logger.warning(
-            f"Blockchain operation timed out for netuid={netuid}, hotkey={hotkey}"
+            "Blockchain operation timed out for netuid=%s, hotkey=%s", netuid, hotkey
         )
 
-        # Prepare a response for the timeout situation
-        operation = "add_stake" if sentiment_score > 0 else "unstake"
-        amount = abs(sentiment_score) * 0.01
-
         return {
             "success": False,
             "operation": operation,
             "netuid": netuid,
             "hotkey": hotkey,
-            "amount": amount,
+            "amount": amount_rao / RAO_PER_TAO,
+            "amount_rao": amount_rao,
             "sentiment_score": sentiment_score,
             "hash": None,
             "error": "Task timed out during blockchain operation",
             "timed_out": True,
         }
     except Exception as e:
-        logger.error(f"Error in blockchain operation: {str(e)}", exc_info=True)
+        logger.error("Error in blockchain operation: %s", e, exc_info=True)
         return {
             "success": False,
             "operation": "unknown",
             "netuid": netuid,
             "hotkey": hotkey,
-            "sentiment_score": sentiment_result.get("sentiment_score", 0),
+            "sentiment_score": sentiment_score,
             "error": str(e),
         }
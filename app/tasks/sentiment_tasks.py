@@ -1,15 +1,27 @@
 from typing import Optional, List, Dict, Any
-import logging
 import asyncio
+import logging
 from celery.exceptions import SoftTimeLimitExceeded  # type: ignore
+from celery.signals import worker_init, worker_process_shutdown
 
-from app.worker import celery_app
+from app.worker import celery_app, run_async
 from app.core.config import settings
 from app.services.sentiment_service import SentimentService
 from app.db import store_sentiment_data  # Import the database function
 
 logger = logging.getLogger(__name__)
 
+# Shared across tasks so its HTTP session, which is bound to the worker's event
+# loop, keeps connections to the external APIs alive between tasks
+sentiment_service = SentimentService()
+
+
+@worker_process_shutdown.connect
+def close_sentiment_session(**kwargs):
+    """Close the HTTP session when the worker process exits."""
+    run_async(sentiment_service.close())
+
+
 # Define standardized error types and messages
 ERROR_TYPES = {
     "CONNECTION_ERROR": "service_unavailable",
@@ -28,6 +40,13 @@ STANDARD_ERROR_MESSAGES = {
     "UNKNOWN_ERROR": "An unexpected error occurred during sentiment analysis",
 }
 
+# (error_type, error_message) pairs, so error paths do a single lookup
+_ERROR_BUNDLES = {
+    key: (ERROR_TYPES[key], STANDARD_ERROR_MESSAGES[key])
+    for key in ERROR_TYPES
+    if key in STANDARD_ERROR_MESSAGES
+}
+
 
 def validate_error_types():
     """
@@ -45,11 +64,13 @@ def validate_error_types():
         logger.error(error_msg)
         raise ValueError(error_msg)
 
-    logger.debug(f"Validated {len(ERROR_TYPES)} error types with standard messages")
+    logger.debug("Validated %d error types with standard messages", len(ERROR_TYPES))
 
 
-# Note: The validate_error_types() function should be called during application
-# initialization in main.py or worker.py, not at module import time
+@worker_init.connect
+def validate_error_types_on_worker_init(**kwargs):
+    """Validate the error types once when the worker starts, not at import time."""
+    validate_error_types()
 
 
 def create_error_response(
@@ -74,7 +95,7 @@ def create_error_response(
     """
     # Log the detailed error info if provided
     if original_error:
-        logger.error(f"{error_message}. Original error: {original_error}")
+        logger.error("%s. Original error: %s", error_message, original_error)
 
     return {
         "success": False,
@@ -85,6 +106,55 @@ def create_error_response(
     }
 
 
+async def analyze_and_store(
+    netuid: int, hotkey: str, timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Analyze sentiment for a subnet and store the result in the database if successful.
+
+    Args:
+        netuid: The subnet ID to analyze sentiment for
+        hotkey: The hotkey to associate with the sentiment analysis
+        timeout: Maximum seconds the analysis may take (optional)
+
+    Raises:
+        asyncio.TimeoutError: If the analysis takes longer than the timeout
+    """
+    result = await asyncio.wait_for(
+        sentiment_service.analyze_sentiment_for_subnet(netuid), timeout
+    )
+
+    # Add hotkey to the result
+    result["hotkey"] = hotkey
+
+    # Store sentiment analysis result in MongoDB
+    if not (
+        result.get("success", False)
+        and "sentiment_score" in result
+        and "tweets" in result
+    ):
+        result["stored_in_db"] = False
+        return result
+
+    try:
+        db_result = await store_sentiment_data(
+            netuid=netuid,
+            tweets=result.get("tweets", []),
+            sentiment_score=result.get("sentiment_score", 0.0),
+        )
+
+        # Add database storage status to result
+        result["stored_in_db"] = True
+        result["db_record_id"] = db_result
+        logger.info("Sentiment data stored in database with ID: %s", db_result)
+    except Exception as db_error:
+        logger.error("Failed to store sentiment data in database: %s", db_error)
+        result["stored_in_db"] = False
+        result["db_error"] = str(db_error)
+
+    return result
+
+
 @celery_app.task(name="analyze_twitter_sentiment")
 def analyze_twitter_sentiment_task(netuid: int, hotkey: str) -> Dict[str, Any]:
     """
@@ -94,6 +164,24 @@ def analyze_twitter_sentiment_task(netuid: int, hotkey: str) -> Dict[str, Any]:
         netuid: The subnet ID to analyze sentiment for
         hotkey: The hotkey to associate with the sentiment analysis
 
+    Returns:
+        Dictionary containing sentiment analysis results
+    """
+    return perform_twitter_sentiment_analysis(netuid, hotkey)
+
+
+def perform_twitter_sentiment_analysis(
+    netuid: int, hotkey: str, timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run the sentiment analysis for a subnet and store the result.
+    Must be called from within a Celery task.
+
+    Args:
+        netuid: The subnet ID to analyze sentiment for
+        hotkey: The hotkey to associate with the sentiment analysis
+        timeout: Maximum seconds the analysis may take (optional)
+
     Returns:
         Dictionary containing sentiment analysis results
     """
@@ -103,80 +191,36 @@ def analyze_twitter_sentiment_task(netuid: int, hotkey: str) -> Dict[str, Any]:
         actual_hotkey = hotkey if hotkey is not None else settings.DEFAULT_HOTKEY
 
         logger.info(
-            f"Starting sentiment analysis for netuid={actual_netuid}, hotkey={actual_hotkey}"
+            "Starting sentiment analysis for netuid=%s, hotkey=%s",
+            actual_netuid,
+            actual_hotkey,
         )
 
-        # Initialize sentiment service
-        sentiment_service = SentimentService()
-
-        # Run the sentiment analysis in the asyncio event loop
-        result = asyncio.run(
-            sentiment_service.analyze_sentiment_for_subnet(actual_netuid)
-        )
-
-        # Add hotkey to the result
-        result["hotkey"] = actual_hotkey
-
-        # Store sentiment analysis result in MongoDB
-        if (
-            result.get("success", False)
-            and "sentiment_score" in result
-            and "tweets" in result
-        ):
-            try:
-                # Create a new event loop for the database operation
-                db_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(db_loop)
-
-                # Store the sentiment data
-                db_result = db_loop.run_until_complete(
-                    store_sentiment_data(
-                        netuid=actual_netuid,
-                        tweets=result.get("tweets", []),
-                        sentiment_score=result.get("sentiment_score", 0.0),
-                    )
-                )
-
-                # Close the loop
-                db_loop.close()
-
-                # Add database storage status to result
-                result["stored_in_db"] = True
-                result["db_record_id"] = db_result
-                logger.info(f"Sentiment data stored in database with ID: {db_result}")
-            except Exception as db_error:
-                logger.error(
-                    f"Failed to store sentiment data in database: {str(db_error)}"
-                )
-                result["stored_in_db"] = False
-                result["db_error"] = str(db_error)
-        else:
-            result["stored_in_db"] = False
+        # Run the analysis and store its result in a single pass on the worker's
+        # event loop
+        result = run_async(analyze_and_store(actual_netuid, actual_hotkey, timeout))
 
         return result
 
-    except SoftTimeLimitExceeded:
-        # Handle soft time limit exceeded - allows for graceful shutdown
+    except (SoftTimeLimitExceeded, asyncio.TimeoutError):
+        # Handle the task's soft time limit or the analysis timeout gracefully
         logger.warning(
-            f"Sentiment analysis timed out for netuid={netuid}, hotkey={hotkey}"
+            "Sentiment analysis timed out for netuid=%s, hotkey=%s", netuid, hotkey
         )
         # Return standardized timeout error
         return create_error_response(
             netuid,
             hotkey,
-            ERROR_TYPES["TIMEOUT_ERROR"],
-            STANDARD_ERROR_MESSAGES["TIMEOUT_ERROR"],
+            *_ERROR_BUNDLES["TIMEOUT_ERROR"],
         )
     except Exception as e:
-        logger.error(f"Error in sentiment analysis task: {str(e)}", exc_info=True)
+        logger.error("Error in sentiment analysis task: %s", e, exc_info=True)
 
         # Categorize the error
         if "connect" in str(e).lower() or "timeout" in str(e).lower():
-            error_type = ERROR_TYPES["CONNECTION_ERROR"]
-            error_message = STANDARD_ERROR_MESSAGES["CONNECTION_ERROR"]
+            error_type, error_message = _ERROR_BUNDLES["CONNECTION_ERROR"]
         else:
-            error_type = ERROR_TYPES["UNKNOWN_ERROR"]
-            error_message = STANDARD_ERROR_MESSAGES["UNKNOWN_ERROR"]
+            error_type, error_message = _ERROR_BUNDLES["UNKNOWN_ERROR"]
 
         return create_error_response(
             netuid, hotkey, error_type, error_message, original_error=str(e)
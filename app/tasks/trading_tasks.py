@@ -0,0 +1,36 @@
+from typing import Dict, Any
+import logging
+
+from app.worker import celery_app
+from app.tasks.sentiment_tasks import perform_twitter_sentiment_analysis
+from app.tasks.blockchain_tasks import process_stake_based_on_sentiment
+
+logger = logging.getLogger(__name__)
+
+# Cap on the sentiment analysis stage, so a slow analysis can't eat into the
+# time left for staking within the task's time limits
+SENTIMENT_STAGE_TIMEOUT_SECONDS = 8
+
+
+@celery_app.task(name="analyze_and_stake")
+def analyze_and_stake_task(netuid: int, hotkey: str) -> Dict[str, Any]:
+    """
+    Celery task that runs sentiment analysis and the resulting stake/unstake
+    operation in one go, saving the broker and result backend round-trip a
+    chain of the two separate tasks would need.
+
+    Args:
+        netuid: The subnet ID to analyze and stake on
+        hotkey: The hotkey to stake/unstake to
+
+    Returns:
+        Dictionary containing the stake operation result, in the same shape as
+        process_stake_based_on_sentiment_task
+    """
+    sentiment_result = perform_twitter_sentiment_analysis(
+        netuid, hotkey, timeout=SENTIMENT_STAGE_TIMEOUT_SECONDS
+    )
+    logger.info(
+        "Sentiment analysis finished for netuid=%s, staking in the same task", netuid
+    )
+    return process_stake_based_on_sentiment(sentiment_result, netuid, hotkey)
@@ -1,18 +1,34 @@
+import asyncio
+import contextlib
+from typing import Any, Coroutine, Optional, TypeVar
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
 
+T = TypeVar("T")
+
 # Initialize Celery
 celery_app = Celery(
     "bittensor_tasks",
     broker=settings.REDIS_BROKER_URL,
     backend=settings.REDIS_BACKEND_URL,
+    # Task modules are only imported by worker processes. The API sends tasks by
+    # name, so it doesn't load the task modules and their services.
+    include=[
+        "app.tasks.sentiment_tasks",
+        "app.tasks.blockchain_tasks",
+        "app.tasks.trading_tasks",
+    ],
 )
 
 # Optional Celery configurations
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    # msgpack is faster to encode/decode than JSON and produces smaller messages.
+    # JSON stays accepted so messages queued before the switch still run.
+    task_serializer="msgpack",
+    accept_content=["msgpack", "json"],
+    result_serializer="msgpack",
+    result_accept_content=["msgpack", "json"],
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -25,15 +41,63 @@ celery_app.conf.update(
     task_default_retry_delay=5,  # 5 seconds delay between retries
     task_max_retries=3,  # Maximum of 3 retries before giving up
     # These defaults are overridden by per-task settings where specified
-    # Increase prefetch multiplier for better throughput
-    worker_prefetch_multiplier=4,  # Prefetch multiple tasks to increase throughput
-    # Keep task_acks_late for reliability, but with higher prefetch to balance
+    # Only reserve one task per process: with acks_late, prefetched tasks stay
+    # invisible to idle workers until the busy one gets to them, and these tasks
+    # can each run for many seconds
+    worker_prefetch_multiplier=1,
+    # Keep task_acks_late for reliability
     task_acks_late=True,  # Acknowledge task after task is completed
     # Additional performance settings
-    worker_max_tasks_per_child=1000,  # Restart worker after 1000 tasks to prevent memory leaks
+    # Recycle a worker process once its resident memory passes 500 MiB (in KiB),
+    # so it is replaced when it actually leaks rather than every N tasks and the
+    # loop, websocket and HTTP connections it holds aren't rebuilt needlessly
+    worker_max_memory_per_child=500_000,
+    # Results are only read while the triggering request is still waiting, so
+    # don't keep them around for the default day
+    result_expires=3600,
+    # Keep idle broker and result backend connections alive, and check them
+    # before use, so a dropped connection doesn't stall the next publish or poll
+    broker_transport_options={"socket_keepalive": True, "health_check_interval": 30},
+    broker_connection_retry_on_startup=True,
+    redis_socket_keepalive=True,
+    redis_backend_health_check_interval=30,
 )
 
-# Import tasks to register them with Celery
-# These imports must be after celery_app initialization to avoid circular imports
-import app.tasks.sentiment_tasks  # noqa
-import app.tasks.blockchain_tasks  # noqa
+# Event loop shared by every task run in this worker process. Reusing it keeps
+# loop-bound clients (AsyncSubtensor websocket, Motor) connected across tasks.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get or create the event loop for this worker process."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion on the worker's event loop.
+
+    If the task is interrupted (e.g. by SoftTimeLimitExceeded), the coroutine is
+    cancelled so it cannot resume during a later task.
+    """
+    loop = get_worker_loop()
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(BaseException):
+                loop.run_until_complete(task)
+        raise
+
+
+@worker_process_init.connect
+def init_worker_loop(**kwargs):
+    """Create the event loop as soon as a worker process starts."""
+    get_worker_loop()
+